@@ -0,0 +1,117 @@
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+
+class ActivityLog:
+    """JSON lines activity log written by a background thread.
+
+    `log()` only puts the record on an in-memory queue, so callers never
+    wait on the disk; the writer thread collects records for up to
+    `flush_seconds` and appends each batch with a single write. The file is rotated to
+    `path.1`, `path.2`, ... once it exceeds `max_bytes` or is older than
+    `rotate_seconds`, keeping `backups` old files. Records that arrive
+    while the queue is full are dropped and counted rather than blocking.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, rotate_seconds=24 * 3600, backups=5,
+                 flush_seconds=1.0, max_queue=10000, batch_size=500):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backups = backups
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.written = 0
+        self._opened = None
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = threading.Event()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, action, **fields):
+        record = {"time": datetime.now().isoformat(timespec="milliseconds"), "action": action, **fields}
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count("dropped")
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _run(self):
+        while not (self._closed.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_seconds)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = 0 if self._closed.is_set() else deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except OSError:
+                # Losing activity records must never take the app down
+                self._count("dropped", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        data = "".join(json.dumps(record, default=str) + "\n" for record in batch).encode("utf-8")
+        self._rotate_if_needed(len(data))
+        # O_APPEND with one write per batch keeps lines whole even if another process shares the file
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        self._count("written", len(batch))
+
+    def _rotate_if_needed(self, incoming):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if self._opened is None:
+            # A file left by an earlier run is dated from its last write
+            self._opened = stat.st_mtime
+        too_big = self.max_bytes and stat.st_size + incoming > self.max_bytes
+        too_old = self.rotate_seconds and time.time() - self._opened > self.rotate_seconds
+        if not (too_big or too_old):
+            return
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._opened = time.time()
+
+    def flush(self, timeout=5.0):
+        """Wait until every queued record has been written, or `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self, timeout=5.0):
+        self._closed.set()
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {"queued": self._queue.qsize(), "written": self.written, "dropped": self.dropped}
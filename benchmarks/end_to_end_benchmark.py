@@ -0,0 +1,222 @@
+"""End-to-end benchmark of the resume pipeline against a fake model backend.
+
+Each scenario runs in a fresh Python process with its own cache directory,
+so peak memory is measured per scenario and no state leaks between them:
+
+  applicant   input_file_setup -> get_gemini_response -> extract_percentage_match,
+              one resume at a time, as the Applicant portal does
+  batch_cold  rank_resumes over the whole corpus, then write_pdf_report
+  batch_warm  the same batch again over batch_cold's caches (document store,
+              result cache, requisition store), as a re-run of a requisition
+
+The model is either an in-process fake (`--backend fake`, see fake_model.py)
+or the HTTP stub (`--backend http`), both with configurable latency and
+error rates. Results are one JSON document with throughput, per-stage
+latency percentiles, peak RSS and environment details, for regression tracking.
+A scenario that scored nothing, reached no model (batch_warm excepted, as it
+is served from the cache) or counted model errors is listed under "failed"
+and the script exits with status 1, so a broken run is never kept as a baseline.
+
+    python benchmarks/end_to_end_benchmark.py --documents 200 --latency 0.3 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCENARIOS = ("applicant", "batch_cold", "batch_warm")
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+- 5+ years building production services in Python.
+- Experience designing REST APIs with Django or FastAPI.
+- Operating PostgreSQL, Redis and Kafka at scale.
+- Deploying to Kubernetes with Terraform-managed AWS infrastructure.
+- Maintaining CI/CD pipelines and mentoring other engineers.
+"""
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def cache_environment(directory, args):
+    return {
+        "RESULT_CACHE_PATH": os.path.join(directory, "results.sqlite3"),
+        "DOCUMENT_STORE_PATH": os.path.join(directory, "documents.sqlite3"),
+        "REQUISITION_STORE_PATH": os.path.join(directory, "requisitions.sqlite3"),
+        "EMBEDDING_CACHE_PATH": os.path.join(directory, "embeddings.sqlite3"),
+        "VECTOR_INDEX_PATH": os.path.join(directory, "vector_index.sqlite3"),
+        "METRICS_PATH": "",
+        "METRICS_PORT": "0",
+        # The fake backend has no quota; keep the scheduler from throttling the benchmark
+        "GEMINI_RPM": str(args.rpm),
+        "GEMINI_TPM": str(args.tpm),
+        "MAX_CONCURRENT_REQUESTS": str(args.concurrency),
+    }
+
+
+def run_scenario(args):
+    # Runs in the child process; scoring reads its settings from the environment at import
+    sys.path.insert(0, BENCHMARK_DIR)
+    from corpus import build_corpus
+
+    corpus = build_corpus(args.documents, args.seed, args.max_pages, args.mix)
+    rss_before = peak_rss_mb()
+
+    import scoring
+    from reports import write_pdf_report
+
+    options = {"latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate,
+               "rate_limit_rate": args.rate_limit_rate}
+    server = None
+    if args.backend == "fake":
+        import fake_model
+        backend_stats = fake_model.install(scoring, seed=args.seed, **options)
+    else:
+        from stub_gemini_server import StubGeminiServer
+        server = StubGeminiServer(**options).start()
+        scoring.configure_gemini("stub-key", "rest", server.endpoint)
+        backend_stats = None
+
+    metrics = scoring.get_metrics()
+    start = time.perf_counter()
+    scored = 0
+    if args.scenario == "applicant":
+        for resume in corpus:
+            with metrics.timer("applicant_request"):
+                parts = scoring.input_file_setup(resume)
+                response = scoring.get_gemini_response(JOB_DESCRIPTION, parts, scoring.prompts["match"], "match")
+                if scoring.extract_percentage_match(response) is not None:
+                    scored += 1
+    else:
+        resumes = {resume.name: resume for resume in corpus}
+        records = scoring.rank_resumes(JOB_DESCRIPTION, resumes, top_k=args.top_k, max_concurrency=args.concurrency,
+                                       store=scoring.get_requisition_store())
+        ranked = sorted((record for record in records if record["status"] == "scored"), reverse=True,
+                        key=lambda record: -1 if record["match_percentage"] is None else record["match_percentage"])
+        scored = len(ranked)
+        report_path = os.path.join(tempfile.gettempdir(), f"report_{os.getpid()}.pdf")
+        with metrics.timer("pdf_report"):
+            write_pdf_report(report_path, [
+                (record["name"], record["match_percentage"], record["response"]) for record in ranked
+            ])
+        metrics.observe("pdf_report_bytes", os.path.getsize(report_path))
+        os.remove(report_path)
+    elapsed = time.perf_counter() - start
+
+    if server:
+        backend_stats = {"calls": server.request_count}
+        server.stop()
+    return {
+        "scenario": args.scenario,
+        "documents": len(corpus),
+        "scored": scored,
+        "wall_seconds": round(elapsed, 3),
+        "documents_per_second": round(len(corpus) / elapsed, 2) if elapsed else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "corpus_rss_mb": rss_before,
+        "backend": backend_stats,
+        "scheduler": scoring.get_scheduler().stats,
+        "counters": metrics.counters(),
+        "stages": metrics.summary(),
+    }
+
+
+def scenario_problems(result):
+    problems = []
+    if not result["scored"]:
+        problems.append("no documents scored")
+    calls = (result["backend"] or {}).get("calls", 0)
+    if not calls and result["scenario"] != "batch_warm":
+        problems.append("no model calls reached the backend")
+    if result["counters"].get("model_errors"):
+        problems.append(f"{result['counters']['model_errors']} model errors")
+    return problems
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BENCHMARK_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    sys.path.insert(0, BENCHMARK_DIR)
+    from corpus import DEFAULT_MIX, parse_mix
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--max-pages", type=int, default=4)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help='document kinds, e.g. "pdf=0.6,docx=0.2,txt=0.2"')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--backend", choices=("fake", "http"), default="fake")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per model call")
+    parser.add_argument("--jitter", type=float, default=0.1, help="extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls failing with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of calls failing with 429")
+    parser.add_argument("--top-k", type=int, default=0, help="BM25 shortlist size for the batch scenarios (0 scores all)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=int, default=1000000)
+    parser.add_argument("--tpm", type=int, default=1000000000)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(args)))
+        return 0
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for scenario in args.scenarios:
+            # batch_warm deliberately reuses batch_cold's caches
+            cache_dir = os.path.join(directory, "batch" if scenario.startswith("batch") else scenario)
+            env = {**os.environ, **cache_environment(cache_dir, args)}
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--scenario", scenario],
+                env=env, capture_output=True, text=True
+            )
+            if completed.returncode != 0:
+                sys.stderr.write(completed.stderr)
+                return completed.returncode
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            result["problems"] = scenario_problems(result)
+            results.append(result)
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "git_commit": git_commit(),
+        },
+        "settings": {key: value for key, value in vars(args).items() if key not in ("scenario", "output")},
+        "scenarios": results,
+        "failed": [result["scenario"] for result in results if result["problems"]],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    for result in results:
+        if result["problems"]:
+            sys.stderr.write(f"{result['scenario']}: {', '.join(result['problems'])}\n")
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
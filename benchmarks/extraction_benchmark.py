@@ -0,0 +1,75 @@
+"""Measure document extraction throughput against the number of pool workers.
+
+A synthetic corpus (see corpus.py) of text PDFs, scanned (image-only)
+PDFs, DOCX and TXT resumes is extracted through scoring.iter_extracted, the same path the
+Interviewer portal and the batch CLI use. Each worker count gets a fresh,
+warmed-up pool, so process start-up is not part of the timing, and an empty
+temporary document store, so no file is served from an earlier run. Results are
+printed as JSON lines with the speedup and parallel efficiency over one
+worker. Poppler (pdftotext/pdftoppm) must be installed for the PDF files.
+
+    python benchmarks/extraction_benchmark.py --documents 500 --workers 1 2 4 8 16
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from corpus import DEFAULT_MIX, build_corpus, parse_mix
+
+import scoring
+
+
+def use_empty_document_store(directory, name):
+    # Extracted documents are stored and reused, which would turn every later pass into store lookups
+    scoring.DOCUMENT_STORE_PATH = os.path.join(directory, f"{name}.sqlite3")
+    scoring.get_document_store.cache_clear()
+
+
+def run(corpus, workers, directory):
+    scoring.EXTRACTION_WORKERS = workers
+    scoring.get_extraction_pool.cache_clear()
+    # Warm the pool so worker start-up (spawn + imports) is not measured
+    use_empty_document_store(directory, f"warmup_{workers}")
+    for _ in scoring.iter_extracted(corpus[:2 * workers]):
+        pass
+    use_empty_document_store(directory, f"workers_{workers}")
+    start = time.perf_counter()
+    unreadable = sum(1 for _, (parts, _) in scoring.iter_extracted(corpus) if not parts)
+    elapsed = time.perf_counter() - start
+    if workers > 1:
+        scoring.get_extraction_pool().shutdown()
+    return elapsed, unreadable
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--max-pages", type=int, default=4)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help='document kinds, e.g. "pdf=0.6,scanned=0.2,docx=0.2"')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.documents, args.seed, args.max_pages, args.mix)
+    print(json.dumps({"documents": len(corpus), "cpu_count": os.cpu_count()}), flush=True)
+    baseline = None
+    baseline_workers = args.workers[0]
+    with tempfile.TemporaryDirectory(prefix="extraction_benchmark_") as directory:
+        for i, workers in enumerate(args.workers):
+            elapsed, unreadable = run(corpus, workers, os.path.join(directory, str(i)))
+            throughput = len(corpus) / elapsed
+            baseline = baseline or throughput
+            print(json.dumps({
+                "workers": workers,
+                "wall_seconds": round(elapsed, 3),
+                "documents_per_second": round(throughput, 1),
+                "speedup": round(throughput / baseline, 2),
+                "efficiency": round(throughput / baseline * baseline_workers / workers, 2),
+                "unreadable": unreadable,
+            }), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""In-process stand-in for genai.GenerativeModel.
+
+Answers generate_content calls after a configurable latency and fails a
+configurable fraction of them with the same google.api_core errors the
+SDK raises for 429 and 503 responses, so scoring's retry path is
+exercised. No network, API key or quota is involved; install it with
+`install(...)`, which replaces scoring.get_model.
+"""
+import json
+import random
+import threading
+import time
+
+from google.api_core import exceptions
+
+from stub_gemini_server import DEFAULT_RESPONSE, MATCH_JSON
+
+
+class FakePart:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.parts = [FakePart(text)] if text else []
+
+
+class FakeGenerativeModel:
+    def __init__(self, generation_config=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, seed=0, stats=None):
+        self.generation_config = generation_config or {}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.stats = stats if stats is not None else {"calls": 0, "errors": 0, "rate_limited": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _answer(self):
+        config = self.generation_config
+        if config.get("response_mime_type") != "application/json":
+            return DEFAULT_RESPONSE
+        # Same answers as the HTTP stub, shaped by the prompt's response schema
+        if "analysis" in config.get("response_schema", {}).get("properties", {}):
+            return json.dumps({
+                "analysis": "Strong Python background; little cloud infrastructure work.",
+                "match": MATCH_JSON,
+                "keyword_analysis": "Missing: Kubernetes, Terraform. Add infrastructure-as-code projects."
+            })
+        return json.dumps(MATCH_JSON)
+
+    def generate_content(self, contents, stream=False, request_options=None):
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            roll = self._random.random()
+            self.stats["calls"] += 1
+        time.sleep(delay)
+        if roll < self.rate_limit_rate:
+            with self._lock:
+                self.stats["rate_limited"] += 1
+            raise exceptions.TooManyRequests("Resource has been exhausted")
+        if roll < self.rate_limit_rate + self.error_rate:
+            with self._lock:
+                self.stats["errors"] += 1
+            raise exceptions.ServiceUnavailable("The service is currently unavailable")
+        text = self._answer()
+        if not stream:
+            return FakeResponse(text)
+        size = max(1, len(text) // 3)
+        return iter([FakeResponse(text[i:i + size]) for i in range(0, len(text), size)])
+
+
+def install(scoring, **options):
+    """Route every scoring model call to FakeGenerativeModel; returns the shared call counters."""
+    from functools import lru_cache
+
+    stats = {"calls": 0, "errors": 0, "rate_limited": 0}
+
+    # Same signature as scoring.get_model, which it replaces
+    @lru_cache(maxsize=None)
+    def get_model(prompt_key=None, model_name=scoring.MODEL_NAME):
+        return FakeGenerativeModel(scoring.GENERATION_CONFIGS.get(prompt_key), stats=stats, **options)
+
+    scoring.get_model = get_model
+    return stats
@@ -0,0 +1,116 @@
+"""Compare upload size and encode time of the page-image settings for scanned resumes.
+
+Every variant prepares the same pages through page_images.prepare_pages,
+the code scoring uses for image-based PDFs, and is reported against the
+previous behaviour (a full color page at PIL's default JPEG quality).
+Pages come from --pdf files rendered with poppler, or from the synthetic
+scanned pages in corpus.py. With --jd, every variant is also scored by
+the model as configured in the environment (GOOGLE_API_KEY, optionally
+GEMINI_API_ENDPOINT), so bytes saved can be weighed against score drift.
+Results are printed as JSON lines.
+
+    python benchmarks/image_payload_benchmark.py --documents 10 --pages 2
+    python benchmarks/image_payload_benchmark.py --pdf scans/*.pdf --jd job.txt
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import statistics
+import time
+
+from corpus import make_scanned_page
+
+import scoring
+from page_images import prepare_pages
+
+VARIANTS = {
+    "baseline": {"crop": False, "adaptive": False},
+    "color_adaptive": {},
+    "grayscale": {"grayscale": True, "crop": False, "adaptive": False},
+    "grayscale_adaptive": {"grayscale": True},
+    "binary": {"binary": True},
+    "grayscale_adaptive_tiled": {"grayscale": True, "tiled": True},
+    "binary_tiled": {"binary": True, "tiled": True},
+}
+
+
+def load_documents(args):
+    if args.pdf:
+        for path in args.pdf:
+            with open(path, "rb") as f:
+                pdf_bytes = f.read()
+            yield os.path.basename(path), scoring.render_pdf_pages(pdf_bytes, 1, args.pages, dpi=args.dpi, grayscale=False)
+        return
+    rng = random.Random(args.seed)
+    for index in range(args.documents):
+        yield f"scan_{index}", [make_scanned_page(rng, index, page) for page in range(1, args.pages + 1)]
+
+
+def score(job_description, outputs):
+    parts = [{"mime_type": mime_type, "data": base64.b64encode(data).decode()} for mime_type, data, _ in outputs]
+    response = scoring.get_gemini_response(job_description, parts, scoring.prompts["match"], "match")
+    return scoring.extract_percentage_match(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", nargs="+", help="scanned PDFs to use instead of synthetic pages")
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=2, help="pages per document")
+    parser.add_argument("--dpi", type=int, default=scoring.RASTER_DPI)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument("--jd", help="job description file; scores every variant with the model")
+    args = parser.parse_args()
+
+    job_description = None
+    if args.jd:
+        with open(args.jd, encoding="utf-8") as f:
+            job_description = f.read()
+        scoring.configure_gemini(os.environ["GOOGLE_API_KEY"])
+
+    results = {name: {"bytes": [], "images": 0, "seconds": [], "scores": []} for name in args.variants}
+    documents = 0
+    for _, pages in load_documents(args):
+        documents += 1
+        for name in args.variants:
+            start = time.perf_counter()
+            outputs = prepare_pages([page.copy() for page in pages], **VARIANTS[name])
+            results[name]["seconds"].append(time.perf_counter() - start)
+            results[name]["bytes"].append(sum(len(data) for _, data, _ in outputs))
+            results[name]["images"] += len(outputs)
+            if job_description:
+                results[name]["scores"].append(score(job_description, outputs))
+        for page in pages:
+            page.close()
+
+    baseline = results.get("baseline")
+    for name, result in results.items():
+        total = sum(result["bytes"])
+        row = {
+            "variant": name,
+            "documents": documents,
+            "images": result["images"],
+            "bytes_per_document": round(total / documents),
+            "base64_bytes_per_document": round(total * 4 / 3 / documents),
+            # Gemini bills every image as a fixed number of tokens
+            "image_tokens_per_document": round(result["images"] * scoring.IMAGE_TOKENS / documents),
+            "encode_ms_p50": round(statistics.median(result["seconds"]) * 1000, 1),
+            "encode_ms_max": round(max(result["seconds"]) * 1000, 1),
+        }
+        if baseline:
+            row["size_vs_baseline"] = round(total / sum(baseline["bytes"]), 3)
+        if job_description:
+            row["mean_score"] = round(statistics.mean(s for s in result["scores"] if s is not None), 1) \
+                if any(s is not None for s in result["scores"]) else None
+            if baseline and name != "baseline":
+                deltas = [abs(a - b) for a, b in zip(result["scores"], baseline["scores"])
+                          if a is not None and b is not None]
+                row["mean_abs_score_change"] = round(statistics.mean(deltas), 2) if deltas else None
+        print(json.dumps(row), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Check the import cost of the Streamlit app's start-up against a budget.
+
+The top-level imports of main.py (and of cli.py with --entry cli.py) are run
+in a fresh interpreter under `python -X importtime`, which is what a new
+Streamlit process pays before the first page renders. The check fails if
+the median total over --runs exceeds --budget-ms, or if any of the heavy
+modules that should only load on demand (PDF export and rasterizing, DOCX
+parsing, the Gemini SDK, scipy) is imported at start-up. --baseline compares
+against the same entry point at an earlier git revision.
+
+    python benchmarks/import_time_check.py --budget-ms 1200 --baseline HEAD~1
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Loaded inside the code paths that need them, never at start-up. Streamlit itself imports
+# plotly and the PIL package, so those are not listed.
+LAZY_MODULES = (
+    "pandas", "matplotlib", "fpdf", "pdf2image", "docx", "PIL.Image",
+    "google.generativeai", "scipy", "sentence_transformers",
+)
+
+
+def startup_imports(path):
+    # Only module-level import statements run before the first page renders
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def measure(directory, entry):
+    code = startup_imports(os.path.join(directory, entry))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=directory, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": directory, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def summarize(directory, entry, runs):
+    samples = [measure(directory, entry) for _ in range(runs)]
+    totals = [sum(self_us for self_us, _ in modules.values()) / 1000 for modules in samples]
+    last = samples[-1]
+    # Each top-level package is charged the cumulative time of its most expensive import
+    packages = {}
+    for name, (_, cumulative_us) in last.items():
+        root = name.split(".")[0]
+        packages[root] = max(packages.get(root, 0), cumulative_us)
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:10]
+    return {
+        "total_ms": round(statistics.median(totals), 1),
+        "modules": len(last),
+        "lazy_modules_loaded": sorted(
+            module for module in LAZY_MODULES
+            if any(name == module or name.startswith(module + ".") for name in last)
+        ),
+        "heaviest_ms": {name: round(us / 1000, 1) for name, us in heaviest},
+    }
+
+
+def export_revision(revision, directory):
+    archive = subprocess.run(["git", "archive", revision], cwd=REPO_DIR, capture_output=True, check=True).stdout
+    with tempfile.TemporaryFile() as f:
+        f.write(archive)
+        f.seek(0)
+        with tarfile.open(fileobj=f) as tar:
+            tar.extractall(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entry", default="main.py", help="script whose start-up imports are measured")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters measured; the median is reported")
+    parser.add_argument("--budget-ms", type=float, default=1200.0)
+    parser.add_argument("--baseline", help="git revision to compare against, e.g. HEAD~1")
+    args = parser.parse_args()
+
+    report = {"entry": args.entry, "budget_ms": args.budget_ms,
+              "current": summarize(os.path.abspath(REPO_DIR), args.entry, args.runs)}
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as directory:
+            export_revision(args.baseline, directory)
+            report["baseline"] = {"revision": args.baseline, **summarize(directory, args.entry, args.runs)}
+        report["saved_ms"] = round(report["baseline"]["total_ms"] - report["current"]["total_ms"], 1)
+    print(json.dumps(report, indent=2))
+
+    current = report["current"]
+    failures = []
+    if current["total_ms"] > args.budget_ms:
+        failures.append(f"start-up imports took {current['total_ms']} ms, over the {args.budget_ms} ms budget")
+    if current["lazy_modules_loaded"]:
+        failures.append(f"imported at start-up: {', '.join(current['lazy_modules_loaded'])}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
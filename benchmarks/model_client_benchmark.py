@@ -0,0 +1,71 @@
+"""Measure per-call client overhead against the local stub Gemini server.
+
+"per_call" reproduces the old behaviour: the SDK is configured and a new
+GenerativeModel is built for every request (as happened on each
+Streamlit rerun). "pooled" configures the SDK once and reuses one model
+instance and its HTTP session for all calls.
+
+    python benchmarks/model_client_benchmark.py --calls 200
+"""
+import argparse
+import json
+import statistics
+import time
+
+import google.generativeai as genai
+
+from stub_gemini_server import StubGeminiServer
+
+MODEL_NAME = "gemini-1.5-flash"
+
+
+def configure(endpoint):
+    genai.configure(api_key="stub-key", transport="rest", client_options={"api_endpoint": endpoint})
+
+
+def timed_calls(calls, call):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def summarize(mode, latencies):
+    ordered = sorted(latencies)
+    return {
+        "mode": mode,
+        "calls": len(latencies),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100)
+    args = parser.parse_args()
+
+    server = StubGeminiServer().start()
+    try:
+        def per_call():
+            configure(server.endpoint)
+            genai.GenerativeModel(MODEL_NAME).generate_content(["job", "resume", "prompt"])
+
+        configure(server.endpoint)
+        model = genai.GenerativeModel(MODEL_NAME, generation_config={"temperature": 0.0})
+
+        def pooled():
+            model.generate_content(["job", "resume", "prompt"])
+
+        pooled()  # warm up the shared connection
+        for mode, call in (("per_call", per_call), ("pooled", pooled)):
+            print(json.dumps(summarize(mode, timed_calls(args.calls, call))), flush=True)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare whole-document and first-page-only PDF rasterization.
+
+Each measurement runs in a fresh subprocess so peak RSS is not shared
+between modes. Results are printed as JSON lines.
+
+    python benchmarks/rasterize_benchmark.py --pages 1 5 10 20
+"""
+import argparse
+import base64
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def make_pdf(path, pages):
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_font("Arial", size=11)
+    for page in range(1, pages + 1):
+        pdf.add_page()
+        pdf.cell(200, 10, txt=f"Candidate resume - page {page}", ln=1)
+        for line in range(40):
+            pdf.cell(200, 6, txt=f"Experience line {line}: built data pipelines, led a team of engineers.", ln=1)
+    pdf.output(path)
+
+
+def run_mode(mode, path, dpi, grayscale):
+    import pdf2image
+
+    with open(path, "rb") as f:
+        pdf_bytes = f.read()
+
+    start = time.perf_counter()
+    if mode == "full":
+        # Previous behaviour: render every page, keep the first one
+        images = pdf2image.convert_from_bytes(pdf_bytes, dpi=dpi, grayscale=grayscale)
+    else:
+        images = pdf2image.convert_from_bytes(
+            pdf_bytes, dpi=dpi, first_page=1, last_page=1, grayscale=grayscale
+        )
+    buffer = io.BytesIO()
+    images[0].save(buffer, format="JPEG")
+    payload = base64.b64encode(buffer.getbuffer()).decode()
+    elapsed = time.perf_counter() - start
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "mode": mode,
+        "wall_seconds": round(elapsed, 4),
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+        "payload_bytes": len(payload),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--grayscale", action="store_true")
+    parser.add_argument("--run", nargs=2, metavar=("MODE", "PDF"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_mode(args.run[0], args.run[1], args.dpi, args.grayscale)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for pages in args.pages:
+            path = f"{workdir}/resume_{pages}p.pdf"
+            make_pdf(path, pages)
+            for mode in ("full", "first_page"):
+                command = [sys.executable, __file__, "--dpi", str(args.dpi), "--run", mode, path]
+                if args.grayscale:
+                    command.append("--grayscale")
+                result = json.loads(subprocess.check_output(command, text=True))
+                result["pages"] = pages
+                print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
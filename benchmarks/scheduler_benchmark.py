@@ -0,0 +1,75 @@
+"""Drive RequestScheduler against the stub Gemini server with injected failures.
+
+Every call should eventually succeed as long as retries and the deadline
+allow it. The report shows throughput against the configured quota and
+how many retries were needed.
+
+    python benchmarks/scheduler_benchmark.py --calls 60 --rpm 600 --rate-limit-rate 0.2 --error-rate 0.1
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import google.generativeai as genai
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import RequestScheduler  # noqa: E402
+from stub_gemini_server import StubGeminiServer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rpm", type=int, default=600)
+    parser.add_argument("--tpm", type=int, default=1000000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    server = StubGeminiServer(latency=args.latency, rate_limit_rate=args.rate_limit_rate,
+                              error_rate=args.error_rate).start()
+    genai.configure(api_key="stub-key", transport="rest", client_options={"api_endpoint": server.endpoint})
+    model = genai.GenerativeModel("gemini-1.5-flash")
+    scheduler = RequestScheduler(args.rpm, args.tpm, max_retries=8, base_delay=0.05, max_delay=1.0,
+                                 deadline_seconds=60)
+
+    def score(i):
+        try:
+            scheduler.run(
+                lambda timeout: model.generate_content(
+                    [f"resume {i}"], request_options={"timeout": timeout, "retry": None}
+                ),
+                estimated_tokens=500
+            )
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(args.workers) as executor:
+            outcomes = list(executor.map(score, range(args.calls)))
+    finally:
+        server.stop()
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "calls": args.calls,
+        "succeeded": sum(outcomes),
+        "failed": args.calls - sum(outcomes),
+        "http_requests": server.request_count,
+        "retries": scheduler.stats["retries"],
+        "elapsed_seconds": round(elapsed, 2),
+        "achieved_rpm": round(server.request_count / elapsed * 60, 1),
+        "quota_rpm": args.rpm,
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Local stand-in for the Gemini REST generateContent endpoint.
+
+Point the app or a benchmark at it with
+GEMINI_API_ENDPOINT=http://127.0.0.1:<port> and GEMINI_TRANSPORT=rest.
+Latency and error rates are configurable so retry and throughput
+behaviour can be exercised without spending API quota.
+
+    python benchmarks/stub_gemini_server.py --port 8765 --latency 0.2 --error-rate 0.1
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MATCH_JSON = {
+    "score": 72,
+    "missing_keywords": ["Kubernetes", "Terraform"],
+    "summary": "Solid backend experience, limited infrastructure exposure."
+}
+
+
+def default_json_response(request):
+    # Answer with whichever structure the request's response schema asks for
+    schema = request.get("generationConfig", {}).get("responseSchema", {})
+    if "analysis" in schema.get("properties", {}):
+        return json.dumps({
+            "analysis": "Strong Python background; little cloud infrastructure work.",
+            "match": MATCH_JSON,
+            "keyword_analysis": "Missing: Kubernetes, Terraform. Add infrastructure-as-code projects."
+        })
+    return json.dumps(MATCH_JSON)
+
+DEFAULT_RESPONSE = (
+    "Percentage match: 72% \n"
+    "Missing keywords: Kubernetes, Terraform\n"
+    "Final thoughts: Solid backend experience, limited infrastructure exposure."
+)
+
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment so keep-alive clients don't hit delayed ACKs
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        config = self.server.config
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.server.record_request(request)
+
+        latency = config["latency"]
+        if config["jitter"]:
+            latency += random.uniform(0, config["jitter"])
+        time.sleep(latency)
+
+        roll = random.random()
+        if roll < config["rate_limit_rate"]:
+            self._send_json(429, {"error": {"code": 429, "message": "Resource has been exhausted", "status": "RESOURCE_EXHAUSTED"}},
+                            headers={"Retry-After": "1"})
+            return
+        if roll < config["rate_limit_rate"] + config["error_rate"]:
+            self._send_json(503, {"error": {"code": 503, "message": "The service is currently unavailable", "status": "UNAVAILABLE"}})
+            return
+
+        text = config["response_text"]
+        # Structured-output requests get a JSON answer, like the real API
+        if request.get("generationConfig", {}).get("responseMimeType") == "application/json":
+            text = config["json_response_text"]
+        if callable(text):
+            text = text(request)
+        prompt_tokens = sum(len(json.dumps(part)) for part in request.get("contents", [])) // 4
+
+        def payload(chunk, finished=True):
+            return {
+                "candidates": [{
+                    "content": {"parts": [{"text": chunk}], "role": "model"},
+                    "finishReason": "STOP" if finished else None,
+                    "index": 0
+                }],
+                "usageMetadata": {
+                    "promptTokenCount": prompt_tokens,
+                    "candidatesTokenCount": len(text) // 4,
+                    "totalTokenCount": prompt_tokens + len(text) // 4
+                }
+            }
+
+        if ":streamGenerateContent" in self.path:
+            size = max(1, len(text) // 3)
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            events = [payload(chunk, i == len(chunks) - 1) for i, chunk in enumerate(chunks)]
+            if "alt=sse" in self.path:
+                # Server-sent events, one per chunk of the answer
+                body = "".join(f"data: {json.dumps(event)}\r\n\r\n" for event in events).encode("utf-8")
+                content_type = "text/event-stream"
+            else:
+                # The REST client without alt=sse reads a JSON array of responses
+                body = json.dumps(events).encode("utf-8")
+                content_type = "application/json"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self._send_json(200, payload(text))
+
+
+class StubGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, response_text=DEFAULT_RESPONSE, json_response_text=default_json_response):
+        super().__init__((host, port), StubGeminiHandler)
+        self.config = {
+            "latency": latency,
+            "jitter": jitter,
+            "error_rate": error_rate,
+            "rate_limit_rate": rate_limit_rate,
+            "response_text": response_text,
+            "json_response_text": json_response_text,
+        }
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+
+    def record_request(self, request):
+        with self._count_lock:
+            self.request_count += 1
+
+    @property
+    def endpoint(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    args = parser.parse_args()
+
+    server = StubGeminiServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.rate_limit_rate)
+    print(f"Stub Gemini endpoint listening on {server.endpoint}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import re
+
+# Rough size of a token in characters of English text, as used for all request estimates
+CHARS_PER_TOKEN = 4
+
+# Blank lines separate resume sections, and pdftotext pages are joined by one as well
+SECTION_BREAK = re.compile(r"\n\s*\n")
+
+
+def pack(units, limit, separator):
+    # Greedily joins consecutive units into strings of at most `limit` characters
+    packed, current = [], ""
+    for unit in units:
+        if current and len(current) + len(separator) + len(unit) > limit:
+            packed.append(current)
+            current = unit
+        else:
+            current = current + separator + unit if current else unit
+    if current:
+        packed.append(current)
+    return packed
+
+
+def split_text(text, limit):
+    """Split text into pieces of at most `limit` characters, at section breaks where possible.
+
+    Sections that are too long on their own are split at line ends, and
+    single lines longer than `limit` wherever they overflow.
+    """
+    units = []
+    for section in SECTION_BREAK.split(text):
+        section = section.strip()
+        if len(section) <= limit:
+            if section:
+                units.append(section)
+            continue
+        lines = []
+        for line in section.split("\n"):
+            lines.extend(line[start:start + limit] for start in range(0, max(len(line), 1), limit))
+        units.extend(pack(lines, limit, "\n"))
+    return pack(units, limit, "\n\n")
+
+
+def chunk_document(parts, budget, image_tokens):
+    """Pack a document's parts, in order, into chunks of at most `budget` estimated tokens.
+
+    Text parts are split with `split_text`; every page image is one piece
+    costing `image_tokens`, so a chunk only exceeds the budget when a single
+    image already does.
+    """
+    pieces = []
+    for part in parts:
+        if part["mime_type"] == "text/plain":
+            pieces.extend(
+                ({"mime_type": "text/plain", "data": text}, len(text) // CHARS_PER_TOKEN)
+                for text in split_text(part["data"], budget * CHARS_PER_TOKEN)
+            )
+        else:
+            pieces.append((part, image_tokens))
+    chunks, current, used = [], [], 0
+    for piece, tokens in pieces:
+        if current and used + tokens > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(piece)
+        used += tokens
+    if current:
+        chunks.append(current)
+    return chunks
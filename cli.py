@@ -0,0 +1,223 @@
+import argparse
+import csv
+import glob
+import json
+import logging
+import os
+import re
+import sys
+from scoring import (
+    MAX_CONCURRENT_REQUESTS,
+    PRERANK_TOP_K,
+    LocalFile,
+    configure_gemini,
+    get_metrics,
+    job_description_text,
+    rank_resumes,
+    search_archive,
+)
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+CSV_FIELDS = ["name", "status", "match_percentage", "local_score", "semantic_score", "missing_keywords", "extraction_path", "response"]
+
+def collect_resume_paths(sources):
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            matches = [os.path.join(source, entry) for entry in os.listdir(source)]
+        else:
+            matches = glob.glob(source, recursive=True)
+        paths.extend(path for path in matches if path.lower().endswith(SUPPORTED_EXTENSIONS) and os.path.isfile(path))
+    # Identical names would collide in the output, so the first occurrence wins
+    resumes = {}
+    for path in sorted(paths):
+        resumes.setdefault(os.path.basename(path), path)
+    return resumes
+
+def read_job_description(path):
+    job_description = job_description_text(LocalFile.from_path(path))
+    if not job_description.strip():
+        raise SystemExit(f"Could not extract text from the job description file: {path}")
+    return job_description
+
+def output_format(path):
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+# Rows with these statuses are final; other rows are reconsidered when an interrupted run is resumed
+FINAL_STATUSES = ("scored", "unreadable")
+
+# csv ends every record with \r\n; a line break inside a quoted field is part of the value
+CSV_RECORD_END = re.compile(rb'"|\r\n')
+
+def complete_end(data, csv_format):
+    # Length of the leading part of `data` made of whole records
+    if not csv_format:
+        return data.rfind(b"\n") + 1
+    end, quoted = 0, False
+    for match in CSV_RECORD_END.finditer(data):
+        if match.group() == b'"':
+            quoted = not quoted
+        elif not quoted:
+            end = match.end()
+    return end
+
+def drop_partial_record(path):
+    # A crash can leave the last record half written; it is cut off before the file is read or appended to
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = complete_end(data, output_format(path) == "csv")
+        if end < len(data):
+            f.truncate(end)
+
+def is_complete(row):
+    if not row.get("name") or not row.get("status"):
+        return False
+    if row["status"] != "scored":
+        return True
+    try:
+        float(row.get("match_percentage"))
+    except (TypeError, ValueError):
+        return False
+    return True
+
+def read_completed(path):
+    # Rows written by a previous (possibly interrupted) run; a later row for the same name supersedes earlier ones
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="", encoding="utf-8") as f:
+        if output_format(path) == "csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = []
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    # A crash can leave a truncated last line behind
+                    continue
+    return list({row["name"]: row for row in rows if isinstance(row, dict) and is_complete(row)}.values())
+
+def to_row(record):
+    return {
+        "name": record["name"],
+        "status": record["status"],
+        "match_percentage": record["match_percentage"],
+        "local_score": record["local_score"],
+        "semantic_score": record.get("semantic_score"),
+        "missing_keywords": ", ".join(record["missing_keywords"]),
+        "extraction_path": (record["document"] or {}).get("path"),
+        "response": record["response"],
+    }
+
+class ResultWriter:
+    def __init__(self, path, written=None):
+        # Status already on file per name, so a resumed run only writes what changed
+        self.written = dict(written or {})
+        self.format = output_format(path)
+        drop_partial_record(path)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a", newline="", encoding="utf-8")
+        if self.format == "csv":
+            self.writer = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+            if new_file:
+                self.writer.writeheader()
+
+    def write(self, record):
+        if record["status"] == "failed":
+            # Failed candidates are retried on the next run instead of being recorded
+            return
+        previous = self.written.get(record["name"])
+        if previous in FINAL_STATUSES or previous == record["status"]:
+            return
+        self.written[record["name"]] = record["status"]
+        row = to_row(record)
+        if self.format == "csv":
+            self.writer.writerow(row)
+        else:
+            self.file.write(json.dumps(row) + "\n")
+        # Flush every row so a crash loses at most the candidate in flight
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+def print_ranking(rows, limit, local_only=False):
+    if local_only:
+        # Semantic scores when sentence-transformers is available, BM25 keyword scores otherwise
+        key = "semantic_score" if any(row.get("semantic_score") not in (None, "") for row in rows) else "local_score"
+        scored = [row for row in rows if row.get(key) not in (None, "")]
+        scored.sort(key=lambda row: float(row[key]), reverse=True)
+        for rank, row in enumerate(scored[:limit], 1):
+            keyword = f" (keyword score {row['local_score']})" if key == "semantic_score" else ""
+            print(f"{rank:>4}. {row['name']}: {key.replace('local', 'keyword').replace('_', ' ')} {row[key]}{keyword}")
+        return
+    scored = [row for row in rows if row.get("status") == "scored" and row.get("match_percentage") not in (None, "")]
+    scored.sort(key=lambda row: float(row["match_percentage"]), reverse=True)
+    for rank, row in enumerate(scored[:limit], 1):
+        semantic = f", semantic score {row['semantic_score']}" if row.get("semantic_score") not in (None, "") else ""
+        print(f"{rank:>4}. {row['name']}: {row['match_percentage']}% (keyword score {row['local_score']}{semantic})")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank a folder of resumes against a job description without the Streamlit UI.")
+    parser.add_argument("--jd", required=True, help="job description file (PDF, DOCX or TXT)")
+    candidates = parser.add_mutually_exclusive_group(required=True)
+    candidates.add_argument("--resumes", nargs="+", help="resume directories or glob patterns")
+    candidates.add_argument("--archive", type=int, metavar="N",
+                            help="instead of files, search every previously processed resume and score the best N")
+    parser.add_argument("--output", required=True, help="results file; .csv writes CSV, anything else JSON lines")
+    parser.add_argument("--top-k", type=int, default=PRERANK_TOP_K, help="resumes sent to the model after local ranking (0 sends all)")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_REQUESTS)
+    parser.add_argument("--show", type=int, default=20, help="number of top candidates to print when done")
+    parser.add_argument("--local-only", action="store_true",
+                        help="rank with the local keyword and semantic scores only, without calling the model")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not args.local_only:
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise SystemExit("Google API key not found in environment variables.")
+        configure_gemini(api_key)
+
+    job_description = read_job_description(args.jd)
+    drop_partial_record(args.output)
+    written = {row["name"]: row["status"] for row in read_completed(args.output)}
+    done = {name for name, status in written.items() if status in FINAL_STATUSES}
+    preloaded = None
+    # The whole set is ranked again so the shortlist matches an uninterrupted run; only the
+    # model calls for candidates already finished are skipped
+    if args.archive is not None:
+        resumes, preloaded = search_archive(job_description, args.archive)
+        logging.info(f"{len(resumes)} archived resumes matched, {len(done & set(resumes))} already in {args.output}")
+    else:
+        paths = collect_resume_paths(args.resumes)
+        logging.info(f"{len(paths)} resumes found, {len(done & set(paths))} already in {args.output}")
+        resumes = {name: LocalFile.from_path(path) for name, path in paths.items()}
+
+    writer = ResultWriter(args.output, written)
+    try:
+        rank_resumes(
+            job_description,
+            resumes,
+            # Archive hits are already a shortlist
+            top_k=0 if args.archive is not None else args.top_k,
+            max_concurrency=args.concurrency,
+            on_progress=lambda step, total: logging.info(f"Progress: {step}/{total}"),
+            on_result=writer.write,
+            use_model=not args.local_only,
+            preloaded=preloaded,
+            skip_model=done
+        )
+    finally:
+        writer.close()
+
+    for row in get_metrics().summary():
+        logging.info(f"{row['metric']}: n={row['count']} p50={row['p50']} p95={row['p95']} p99={row['p99']} max={row['max']}")
+    print_ranking(read_completed(args.output), args.show, args.local_only)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import json
+import time
+
+from sqlite_store import SQLiteStore
+
+
+class DocumentStore(SQLiteStore):
+    """Persistent SQLite store of extracted documents keyed by content hash, with LRU eviction under a size cap.
+
+    Each entry holds the model-ready parts (text and base64 page images) and the
+    extraction metadata: path, page count, image pages and extraction time.
+    `on_evict`, if given, is called with the keys of entries dropped to stay
+    under the size cap.
+    """
+
+    TABLE = "documents"
+    COLUMNS = ("key TEXT PRIMARY KEY, parts TEXT NOT NULL, info TEXT NOT NULL, size INTEGER NOT NULL,"
+               " created REAL NOT NULL, accessed REAL NOT NULL")
+
+    def __init__(self, path, max_bytes=500 * 1024 * 1024, on_evict=None):
+        super().__init__(path, max_bytes)
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT parts, info FROM documents WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE documents SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return json.loads(row[0]), json.loads(row[1])
+
+    def put(self, key, parts, info):
+        parts = json.dumps(parts)
+        info = json.dumps(info)
+        size = len(parts) + len(info)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO documents (key, parts, info, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, parts, info, size, now, now)
+            )
+            evicted = self._evict(conn)
+        if evicted and self.on_evict is not None:
+            self.on_evict(evicted)
+
+    def clear(self, keep=()):
+        """Delete every entry except the given keys."""
+        keep = set(keep)
+        with self._lock, self._connect() as conn:
+            if not keep:
+                conn.execute("DELETE FROM documents")
+                return
+            keys = [key for (key,) in conn.execute("SELECT key FROM documents") if key not in keep]
+            conn.executemany("DELETE FROM documents WHERE key = ?", [(key,) for key in keys])
+
+    def stats(self):
+        with self._lock, self._connect() as conn:
+            entries, size = self._size(conn)
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
@@ -1,19 +1,45 @@
 from dotenv import load_dotenv
-import base64
 import streamlit as st
 import os
-import io
-from PIL import Image
-import pdf2image
-import google.generativeai as genai
-from docx import Document
+import logging
 from datetime import datetime
-import pandas as pd
-import matplotlib.pyplot as plt
-import re
 import plotly.graph_objects as go
-from fpdf import FPDF
+import threading
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import scoring
+from reports import write_pdf_report
+from result_cache import make_cache_key
+from scoring import (
+    MAX_CONCURRENT_REQUESTS,
+    MODEL_NAME,
+    PRERANK_TOP_K,
+    configure_gemini,
+    get_result_cache,
+    get_scheduler,
+    get_requisition_store,
+    get_document_store,
+    get_embedding_cache,
+    get_vector_index,
+    get_metrics,
+    get_activity_log,
+    export_metrics,
+    start_metrics_endpoint,
+    metrics_text,
+    search_archive,
+    cached_gemini_response,
+    stream_cached_gemini_response,
+    job_description_from_parts,
+    input_file_setup,
+    LocalFile,
+    extract_percentage_match,
+    format_match_response,
+    generate_all_reports,
+    REPORT_TITLES,
+    rank_resumes,
+)
 
 # Load environment variables
 load_dotenv()
@@ -24,108 +50,176 @@ if not API_KEY:
     st.error("Google API key not found in environment variables.")
     st.stop()
 
-genai.configure(api_key=API_KEY)
+configure_gemini(API_KEY)
+start_metrics_endpoint()
 
-def get_gemini_response(input_text, pdf_content, prompt):
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content([input_text, pdf_content[0], prompt])
-        return response.text
-    except Exception as e:
-        st.error(f"Error generating response: {str(e)}")
-        return None
-
-def input_file_setup(uploaded_file):
-    try:
-        if uploaded_file.type == "application/pdf":
-            images = pdf2image.convert_from_bytes(uploaded_file.read(), dpi=200)
-            first_page = images[0]
-            img_byte_arr = io.BytesIO()
-            first_page.save(img_byte_arr, format='JPEG')
-            file_parts = [{
-                "mime_type": "image/jpeg",
-                "data": base64.b64encode(img_byte_arr.getvalue()).decode()
-            }]
-            return file_parts
-        elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            doc = Document(uploaded_file)
-            doc_text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            return [{"mime_type": "text/plain", "data": doc_text}]
-        elif uploaded_file.type == "text/plain":
-            text_content = uploaded_file.read().decode("utf-8")
-            return [{"mime_type": "text/plain", "data": text_content}]
+# Free-text prompts are streamed to the page; structured (JSON) answers are only useful once complete
+STREAMED_PROMPTS = ("analysis", "keyword_analysis")
+LIVE_UPDATE_SECONDS = float(os.getenv("LIVE_UPDATE_SECONDS", "0.5"))
+LIVE_LEADERBOARD_SIZE = 10
+REPORT_DIR = os.path.join(tempfile.gettempdir(), "resume_ranker_reports")
+REPORT_MAX_AGE_SECONDS = 24 * 3600
+
+class StreamlitLogHandler(logging.Handler):
+    # Shows errors and warnings from the scoring module on the page of the session that caused them
+    def emit(self, record):
+        if record.levelno >= logging.ERROR:
+            st.error(record.getMessage())
         else:
-            st.error("Unsupported file format. Please upload a PDF, DOCX, or TXT file.")
-            return None
-    except Exception as e:
-        st.error(f"Error processing file: {str(e)}")
-        return None
+            st.warning(record.getMessage())
 
-def log_user_action(action, response):
-    with open("user_activity_log.txt", "a") as log_file:
-        log_file.write(f"{datetime.now()} - {action} - Response: {response[:200]}...\n")
+@st.cache_resource
+def install_log_handler():
+    handler = StreamlitLogHandler(level=logging.WARNING)
+    scoring.logger.addHandler(handler)
+    return handler
 
-def extract_percentage_match(response):
-    try:
-        match = re.search(r'(\d{1,3})%\s', response)
-        return int(match.group(1)) if match else None
-    except:
-        return None
-
-def create_pdf_report(analysis_results, match_percentages=None):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
+install_log_handler()
+
+def log_user_action(action, **fields):
+    # Only queues the record; the activity log's writer thread does the file I/O
+    activity_log = get_activity_log()
+    if activity_log:
+        ctx = get_script_run_ctx()
+        activity_log.log(action, session=ctx.session_id if ctx else None, model=MODEL_NAME, **fields)
+
+def upload_fingerprint(files):
+    # file_id changes whenever a file is removed and uploaded again, so it identifies the upload set
+    return "|".join(f"{file.name}:{file.file_id}" for file in files)
+
+@st.cache_data(show_spinner=False)
+def extract_job_description_parts(file_name, file_bytes, mime_type):
+    # Only the extraction is cached here; a scanned file is read by the model outside this cache,
+    # so a failed model call is not remembered as an empty job description
+    return input_file_setup(LocalFile(file_name, file_bytes, mime_type))
+
+def script_context_initializer():
+    # Worker threads need the script context so st.error calls still reach the page
+    ctx = get_script_run_ctx()
+    return lambda: add_script_run_ctx(threading.current_thread(), ctx)
+
+def analyze_resumes(job_description, resumes, top_k=PRERANK_TOP_K, max_concurrency=MAX_CONCURRENT_REQUESTS, preloaded=None):
+    analysis_results = {}
+    match_percentages = {}
+    document_info = {}
+    local_scores = {}
+    semantic_scores = {}
     
-    def safe_text(text):
-        return text.encode('latin1', 'replace').decode('latin1')
+    live_scores = {}
+    live_placeholder = st.empty()
+    last_update = [0.0]
     
-    pdf.set_font("Arial", 'B', 16)
-    pdf.cell(200, 10, txt=safe_text("Resume Analysis Report"), ln=1, align='C')
-    pdf.ln(10)
+    def render_live(force=False):
+        # Redraws are throttled; each one replaces the previous leaderboard in the placeholder
+        now = time.monotonic()
+        if not live_scores or (not force and now - last_update[0] < LIVE_UPDATE_SECONDS):
+            return
+        last_update[0] = now
+        leaders = sorted(live_scores.items(), key=lambda x: x[1], reverse=True)[:LIVE_LEADERBOARD_SIZE]
+        with live_placeholder.container():
+            col1, col2 = st.columns([1, 2])
+            with col1:
+                st.markdown(f"### ⏱️ Live Ranking ({len(live_scores)} scored)")
+                for rank, (name, score) in enumerate(leaders, 1):
+                    st.markdown(f"**#{rank}** {name} — {score}%")
+            with col2:
+                st.plotly_chart(create_3d_graph(dict(leaders)), use_container_width=True,
+                                key=f"live_chart_{len(live_scores)}_{now}")
     
-    pdf.set_font("Arial", size=12)
+    def on_result(record):
+        if record["status"] == "scored" and record["match_percentage"] is not None:
+            live_scores[record["name"]] = record["match_percentage"]
+            render_live()
     
-    if match_percentages:
-        pdf.set_font("Arial", 'B', 14)
-        pdf.cell(200, 10, txt=safe_text("Candidate Match Scores:"), ln=1)
-        pdf.ln(5)
-        
-        for i, (name, score) in enumerate(match_percentages.items(), 1):
-            pdf.cell(200, 10, txt=safe_text(f"{i}. {name}: {score}%"), ln=1)
-        pdf.ln(10)
+    with st.spinner('🔍 Analyzing resumes...'):
+        progress_bar = st.progress(0)
+        records = rank_resumes(
+            job_description,
+            resumes,
+            top_k=top_k,
+            max_concurrency=max_concurrency,
+            store=get_requisition_store(),
+            on_progress=lambda done, total: progress_bar.progress(done / total),
+            on_result=on_result,
+            initializer=script_context_initializer(),
+            preloaded=preloaded
+        )
+    # The final ranking is rendered from session state below
+    live_placeholder.empty()
     
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(200, 10, txt=safe_text("Detailed Analysis:"), ln=1)
-    pdf.ln(5)
+    reused = sum(1 for record in records if record["reused"])
+    if reused:
+        st.info(f"Reused {reused} earlier result(s) for this job description; "
+                f"processed {len(records) - reused} new or changed resume(s).")
     
-    pdf.set_font("Arial", size=12)
-    for line in analysis_results.split('\n'):
-        pdf.multi_cell(0, 10, txt=safe_text(line))
+    for record in records:
+        name = record["name"]
+        local_scores[name] = record["local_score"]
+        if record.get("semantic_score") is not None:
+            semantic_scores[name] = record["semantic_score"]
+        if record["status"] == "scored":
+            analysis_results[name] = record["response"]
+            document_info[name] = record["document"]
+            if record["match_percentage"] is not None:
+                match_percentages[name] = record["match_percentage"]
     
-    return pdf.output(dest='S').encode('latin1', 'replace')
+    return analysis_results, match_percentages, document_info, local_scores, semantic_scores
 
-def analyze_resumes(job_description, resumes):
-    analysis_results = {}
-    match_percentages = {}
-    
-    with st.spinner('🔍 Analyzing resumes...'):
-        progress_bar = st.progress(0)
-        total_files = len(resumes)
-        
-        for i, (name, resume) in enumerate(resumes.items()):
-            progress_bar.progress((i + 1) / total_files)
-            file_content = input_file_setup(resume)
-            if file_content:
-                prompt = prompts["match"]
-                response = get_gemini_response(job_description, file_content, prompt)
-                if response:
-                    analysis_results[name] = response
-                    percentage = extract_percentage_match(response)
-                    if percentage is not None:
-                        match_percentages[name] = percentage
-    
-    return analysis_results, match_percentages
+def semantic_label(semantic_scores, name):
+    # Only shown when the optional embedding model is installed
+    return f" • Semantic Score: {semantic_scores[name]}" if name in semantic_scores else ""
+
+@st.cache_resource
+def get_report_executor():
+    # PDF reports are written off the script thread so large requisitions never block the page
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf-report")
+
+def remove_report(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def prune_reports():
+    # Reports from sessions that ended without replacing their ranking are cleaned up here
+    cutoff = time.time() - REPORT_MAX_AGE_SECONDS
+    for entry in os.scandir(REPORT_DIR):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                remove_report(entry.path)
+        except OSError:
+            pass
+
+def build_pdf_report(path, candidates):
+    prune_reports()
+    with get_metrics().timer("pdf_report"):
+        write_pdf_report(path, candidates)
+    export_metrics()
+    return path
+
+def start_pdf_report(ranking):
+    analysis_results = ranking["analysis_results"]
+    match_percentages = ranking["match_percentages"]
+    # Best match first; analyses without a score go last
+    names = sorted(analysis_results, key=lambda name: match_percentages.get(name, -1), reverse=True)
+    candidates = [(name, match_percentages.get(name), analysis_results[name]) for name in names]
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="candidate_analysis_", suffix=".pdf", dir=REPORT_DIR)
+    os.close(fd)
+    ranking["pdf_path"] = path
+    ranking["pdf_report"] = get_report_executor().submit(build_pdf_report, path, candidates)
+
+def discard_pdf_report(ranking):
+    if ranking and ranking.get("pdf_report") is not None:
+        path = ranking["pdf_path"]
+        # A report still being written is removed as soon as it finishes
+        ranking["pdf_report"].add_done_callback(lambda _: remove_report(path))
+
+@st.fragment(run_every=1)
+def wait_for_pdf_report(future):
+    if future.done():
+        st.rerun()
+    st.info("⏳ Preparing the PDF report in the background...")
 
 def create_3d_graph(match_percentages):
     names = list(match_percentages.keys())
@@ -156,22 +250,6 @@ def create_3d_graph(match_percentages):
     
     return fig
 
-# Prompts for Gemini AI
-prompts = {
-    "analysis": """
-    You are an experienced Technical Human Resource Manager. Review the provided resume against the job description.
-    Provide a detailed professional evaluation, highlighting strengths and weaknesses in relation to the specified job requirements.
-    """,
-    "match": """
-    You are a skilled ATS (Applicant Tracking System) scanner. Evaluate the resume against the provided job description.
-    Provide the percentage match, list missing keywords, and share your final thoughts.
-    """,
-    "keyword_analysis": """
-    You are an advanced AI-powered career consultant. Analyze the job description and the uploaded resume to identify critical keywords.
-    List the most important keywords from the job description that are missing in the resume and suggest areas for improvement.
-    """
-}
-
 # Streamlit app setup
 st.set_page_config(
     page_title="Resume Expert Pro+",
@@ -517,6 +595,50 @@ with st.sidebar:
             - View detailed analysis
             """)
     
+    with st.expander("⚡ Response Cache"):
+        cache_stats = get_result_cache().stats()
+        st.write(f"Hits: {cache_stats['hits']} • Misses: {cache_stats['misses']}")
+        st.write(f"Entries: {cache_stats['entries']} ({cache_stats['bytes'] / 1024:.1f} KB)")
+        document_stats = get_document_store().stats()
+        st.write(f"Stored documents: {document_stats['entries']} ({document_stats['bytes'] / 1024:.1f} KB) • "
+                 f"Reused: {document_stats['hits']}")
+        scheduler_stats = get_scheduler().stats
+        st.write(f"Model requests: {scheduler_stats['requests']} • Retries: {scheduler_stats['retries']} • "
+                 f"Failures: {scheduler_stats['failures']}")
+        if st.button("Clear cache", key="clear_result_cache"):
+            get_result_cache().clear()
+            get_requisition_store().clear()
+            # Archived resumes cannot be re-scored without their stored documents, so those are kept
+            get_document_store().clear(keep=get_vector_index().keys())
+            get_embedding_cache().clear()
+            st.success("Cache cleared")
+        archive_size = len(get_vector_index())
+        st.write(f"Archived resumes: {archive_size}")
+        confirm_clear_archive = st.checkbox(
+            f"Remove all {archive_size} archived resumes",
+            key="confirm_clear_archive",
+            disabled=not archive_size
+        )
+        if st.button("Clear archive", key="clear_archive", disabled=not confirm_clear_archive):
+            get_vector_index().clear()
+            get_document_store().clear()
+            st.success("Archive cleared")
+
+    with st.expander("📈 Diagnostics"):
+        st.caption("Stage latencies (seconds) and payload sizes (bytes) since the app started")
+        diagnostics = get_metrics().summary()
+        if diagnostics:
+            st.dataframe(diagnostics, hide_index=True, use_container_width=True)
+        else:
+            st.write("No requests yet.")
+        st.download_button(
+            "Download metrics (Prometheus)",
+            data=metrics_text(),
+            file_name="metrics.prom",
+            mime="text/plain",
+            key="download_metrics"
+        )
+
     st.markdown("""
     <div class="sidebar-footer">
         <div class="progress-tracker">
@@ -581,7 +703,7 @@ if role == "Applicant":
     st.markdown("---")
     st.markdown("### 🔍 Analysis Options")
     
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         analyze_button = st.button(
@@ -604,67 +726,145 @@ if role == "Applicant":
             use_container_width=True
         )
     
-    if analyze_button or match_button or keyword_button:
+    with col4:
+        all_button = st.button(
+            "📑 All Reports",
+            help="Get all three reports from a single upload of your resume",
+            use_container_width=True
+        )
+
+    # Keep the last report across reruns until the job description or resume changes
+    report_fingerprint = make_cache_key(input_text, upload_fingerprint([uploaded_file] if uploaded_file else []))
+    report = st.session_state.get("applicant_report")
+    if report and report["fingerprint"] != report_fingerprint:
+        del st.session_state["applicant_report"]
+        report = None
+
+    if analyze_button or match_button or keyword_button or all_button:
         if not input_text.strip():
             st.error("Please enter a job description")
         elif not uploaded_file:
             st.error("Please upload your resume")
         else:
-            with st.spinner('🔍 Analyzing your resume...'):
-                file_content = input_file_setup(uploaded_file)
-                if file_content:
-                    if analyze_button:
-                        selected_prompt = prompts["analysis"]
-                        action = "Comprehensive Analysis"
-                    elif match_button:
-                        selected_prompt = prompts["match"]
-                        action = "Match Percentage"
-                    else:
-                        selected_prompt = prompts["keyword_analysis"]
-                        action = "Keyword Analysis"
-                    
-                    response = get_gemini_response(input_text, file_content, selected_prompt)
-                    
-                    if response:
-                        st.balloons()
-                        st.markdown("---")
+            action_start = time.perf_counter()
+            cache_hits = get_result_cache().hits
+            if analyze_button:
+                prompt_key = "analysis"
+                action = "Comprehensive Analysis"
+            elif match_button:
+                prompt_key = "match"
+                action = "Match Percentage"
+            elif keyword_button:
+                prompt_key = "keyword_analysis"
+                action = "Keyword Analysis"
+            else:
+                prompt_key = "all_reports"
+                action = "All Reports"
+
+            percentage = None
+            if prompt_key in STREAMED_PROMPTS:
+                # Free-text reports are shown as they arrive; the full report is rendered below once done
+                stream_placeholder = st.empty()
+                try:
+                    with stream_placeholder.container():
                         st.markdown("## 📋 Analysis Report")
-                        
-                        with st.expander("View Full Analysis", expanded=True):
-                            if match_button or analyze_button:
-                                percentage = extract_percentage_match(response)
-                                if percentage is not None:
-                                    color = "#4CAF50" if percentage >= 70 else "#FFC107" if percentage >= 50 else "#F44336"
-                                    st.markdown(f"""
-                                    <div class="match-container">
-                                        <div class="match-circle" style="background: linear-gradient(135deg, {color}, #2196F3);">
-                                            <span class="match-percentage">{percentage}%</span>
-                                            <span class="match-label">Match Score</span>
-                                        </div>
-                                        <div class="score-feedback">
-                                            {"> 85%: Excellent match!" if percentage >= 85 else 
-                                             "70-84%: Good match" if percentage >= 70 else 
-                                             "50-69%: Needs improvement" if percentage >= 50 else 
-                                             "<50%: Significant improvements needed"}
-                                        </div>
-                                    </div>
-                                    """, unsafe_allow_html=True)
-                            
-                            st.markdown(f"""
-                            <div class="analysis-results">
-                                {response}
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
-                        st.download_button(
-                            label="📥 Download Full Report",
-                            data=response,
-                            file_name=f"resume_analysis_{datetime.now().strftime('%Y%m%d_%H%M')}.txt",
-                            mime="text/plain",
-                            use_container_width=True
+                        response = st.write_stream(
+                            stream_cached_gemini_response(
+                                input_text, uploaded_file, prompt_key, initializer=script_context_initializer()
+                            )
+                        )
+                    if not isinstance(response, str):
+                        response = "".join(str(chunk) for chunk in response or [])
+                except Exception as e:
+                    # A report cut off part-way is discarded rather than shown or saved as if complete
+                    response = None
+                    get_metrics().increment("model_errors")
+                    st.error(f"The report could not be completed, please try again: {str(e)}")
+                stream_placeholder.empty()
+                percentage = extract_percentage_match(response) if response else None
+            else:
+                with st.spinner('🔍 Analyzing your resume...'):
+                    if prompt_key == "all_reports":
+                        reports, _ = generate_all_reports(
+                            input_text, uploaded_file, initializer=script_context_initializer()
                         )
-                        
-                        log_user_action(action, response)
+                        response = None
+                        if reports:
+                            percentage = extract_percentage_match(reports.get("match"))
+                            if "match" in reports:
+                                reports["match"] = format_match_response(reports["match"])
+                            response = "\n\n".join(
+                                f"### {REPORT_TITLES[key]}\n\n{text}" for key, text in reports.items()
+                            )
+                    else:
+                        response, _ = cached_gemini_response(
+                            input_text, uploaded_file, prompt_key, initializer=script_context_initializer()
+                        )
+                        if response:
+                            percentage = extract_percentage_match(response)
+                            if prompt_key == "match":
+                                response = format_match_response(response)
+
+            if response:
+                st.balloons()
+                report = {
+                    "fingerprint": report_fingerprint,
+                    "response": response,
+                    "percentage": percentage if prompt_key != "keyword_analysis" else None,
+                    "file_name": f"resume_analysis_{datetime.now().strftime('%Y%m%d_%H%M')}.txt",
+                }
+                st.session_state["applicant_report"] = report
+            latency = time.perf_counter() - action_start
+            log_user_action(
+                action,
+                prompt=prompt_key,
+                latency_seconds=round(latency, 3),
+                # Approximate while other sessions share the cache, exact for a single user
+                cache_hit=get_result_cache().hits > cache_hits,
+                score=percentage,
+                success=bool(response),
+                response_chars=len(response or "")
+            )
+            get_metrics().observe("applicant_report_seconds", latency)
+            export_metrics()
+
+    if report:
+        response = report["response"]
+        percentage = report["percentage"]
+        st.markdown("---")
+        st.markdown("## 📋 Analysis Report")
+
+        with st.expander("View Full Analysis", expanded=True):
+            if percentage is not None:
+                color = "#4CAF50" if percentage >= 70 else "#FFC107" if percentage >= 50 else "#F44336"
+                st.markdown(f"""
+                <div class="match-container">
+                    <div class="match-circle" style="background: linear-gradient(135deg, {color}, #2196F3);">
+                        <span class="match-percentage">{percentage}%</span>
+                        <span class="match-label">Match Score</span>
+                    </div>
+                    <div class="score-feedback">
+                        {"> 85%: Excellent match!" if percentage >= 85 else
+                         "70-84%: Good match" if percentage >= 70 else
+                         "50-69%: Needs improvement" if percentage >= 50 else
+                         "<50%: Significant improvements needed"}
+                    </div>
+                </div>
+                """, unsafe_allow_html=True)
+
+            st.markdown(f"""
+            <div class="analysis-results">
+                {response}
+            </div>
+            """, unsafe_allow_html=True)
+
+        st.download_button(
+            label="📥 Download Full Report",
+            data=response,
+            file_name=report["file_name"],
+            mime="text/plain",
+            use_container_width=True
+        )
 
 elif role == "Interviewer":
     st.markdown("""
@@ -710,85 +910,194 @@ elif role == "Interviewer":
                 key="jd_uploader"
             )
             if jd_file:
-                file_content = input_file_setup(jd_file)
-                if file_content and file_content[0]["mime_type"] == "text/plain":
-                    job_description = file_content[0]["data"]
-                else:
+                job_description = job_description_from_parts(
+                    extract_job_description_parts(jd_file.name, jd_file.getvalue(), jd_file.type)
+                )
+                if not job_description.strip():
                     st.error("Could not extract text from the job description file.")
     
     with st.container():
         st.markdown("### 📄 Candidate Resumes")
-        resume_files = st.file_uploader(
-            "Upload candidate resumes (PDF only):",
-            type=["pdf"],
-            accept_multiple_files=True,
-            help="Upload multiple resumes in PDF format",
-            key="resume_uploader"
+        candidate_source = st.radio(
+            "Candidates:",
+            ["Upload Resumes", "Search Archive"],
+            horizontal=True,
+            help="Search Archive matches the job description against every resume processed before, without re-uploading"
         )
         
-        if resume_files:
-            st.success(f"✅ {len(resume_files)} resumes uploaded successfully!")
+        resume_files = []
+        if candidate_source == "Upload Resumes":
+            resume_files = st.file_uploader(
+                "Upload candidate resumes (PDF only):",
+                type=["pdf"],
+                accept_multiple_files=True,
+                help="Upload multiple resumes in PDF format",
+                key="resume_uploader"
+            )
+
+            if resume_files:
+                st.success(f"✅ {len(resume_files)} resumes uploaded successfully!")
+
+            top_k = st.number_input(
+                "Shortlist size for AI analysis:",
+                min_value=0,
+                value=PRERANK_TOP_K,
+                help="Resumes are first ranked locally by keyword relevance; only the top ones are sent to the AI model (0 sends all)"
+            )
+        else:
+            archive_size = len(get_vector_index())
+            st.caption(f"{archive_size} resumes in the archive")
+            top_k = st.number_input(
+                "Candidates to retrieve for AI analysis:",
+                min_value=1,
+                value=PRERANK_TOP_K,
+                help="The closest resumes by semantic similarity are sent to the AI model for detailed analysis"
+            )
+
+    # Rankings survive reruns (expanding a panel, downloading the report) until an input changes
+    ranking_fingerprint = make_cache_key(
+        job_description, candidate_source, str(int(top_k)), upload_fingerprint(resume_files or [])
+    )
+    ranking = st.session_state.get("ranking")
+    if ranking and ranking["fingerprint"] != ranking_fingerprint:
+        discard_pdf_report(ranking)
+        del st.session_state["ranking"]
+        ranking = None
     
     if st.button("🚀 Analyze Candidates", use_container_width=True):
         if not job_description.strip():
             st.error("Please provide a job description")
-        elif not resume_files or len(resume_files) == 0:
+        elif candidate_source == "Upload Resumes" and not resume_files:
             st.error("Please upload at least one resume")
         else:
-            resumes = {file.name: file for file in resume_files}
-            analysis_results, match_percentages = analyze_resumes(job_description, resumes)
-            
-            if analysis_results and match_percentages:
-                st.balloons()
-                sorted_candidates = sorted(match_percentages.items(), key=lambda x: x[1], reverse=True)
-                
-                st.markdown("---")
-                st.markdown("## 📊 Candidate Ranking")
-                
-                col1, col2 = st.columns([1, 2])
-                
-                with col1:
-                    st.markdown("### 🏆 Top Candidates")
-                    for rank, (name, score) in enumerate(sorted_candidates, 1):
-                        with st.container():
-                            st.markdown(f"""
-                            <div class="resume-card">
-                                <div style="display: flex; align-items: center;">
-                                    <span class="candidate-rank">#{rank}</span>
-                                    <div>
-                                        <strong>{name}</strong><br>
-                                        Match Score: <strong>{score}%</strong>
-                                    </div>
-                                </div>
+            preloaded = None
+            if candidate_source == "Upload Resumes":
+                resumes = {file.name: file for file in resume_files}
+            else:
+                with st.spinner('🔎 Searching the archive...'):
+                    resumes, preloaded = search_archive(job_description, int(top_k))
+                # Archive hits are already the shortlist
+                top_k = 0
+                if not resumes:
+                    st.warning("No archived resumes found. Resumes are added to the archive as they are analyzed.")
+            if resumes:
+                metrics_mark = get_metrics().mark()
+                batch_start = time.perf_counter()
+                cache_hits = get_result_cache().hits
+                analysis_results, match_percentages, document_info, local_scores, semantic_scores = analyze_resumes(
+                    job_description, resumes, top_k=int(top_k), preloaded=preloaded
+                )
+                log_user_action(
+                    "Rank Resumes",
+                    source=candidate_source,
+                    candidates=len(resumes),
+                    scored=len(match_percentages),
+                    latency_seconds=round(time.perf_counter() - batch_start, 3),
+                    cache_hits=get_result_cache().hits - cache_hits,
+                    score=max(match_percentages.values(), default=None)
+                )
+                ranking = {
+                    "fingerprint": ranking_fingerprint,
+                    "names": list(resumes),
+                    "analysis_results": analysis_results,
+                    "match_percentages": match_percentages,
+                    "document_info": document_info,
+                    "local_scores": local_scores,
+                    "semantic_scores": semantic_scores,
+                    # Other sessions' requests in the same window are included too
+                    "metrics": get_metrics().summary(since=metrics_mark),
+                    "pdf_report": None,
+                    "report_file_name": f"candidate_analysis_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf",
+                }
+                discard_pdf_report(st.session_state.get("ranking"))
+                st.session_state["ranking"] = ranking
+                if analysis_results and match_percentages:
+                    st.balloons()
+
+    if ranking and ranking["analysis_results"] and ranking["match_percentages"]:
+        analysis_results = ranking["analysis_results"]
+        match_percentages = ranking["match_percentages"]
+        document_info = ranking["document_info"]
+        local_scores = ranking["local_scores"]
+        semantic_scores = ranking["semantic_scores"]
+        sorted_candidates = sorted(match_percentages.items(), key=lambda x: x[1], reverse=True)
+
+        st.markdown("---")
+        st.markdown("## 📊 Candidate Ranking")
+
+        col1, col2 = st.columns([1, 2])
+
+        with col1:
+            st.markdown("### 🏆 Top Candidates")
+            for rank, (name, score) in enumerate(sorted_candidates, 1):
+                with st.container():
+                    st.markdown(f"""
+                    <div class="resume-card">
+                        <div style="display: flex; align-items: center;">
+                            <span class="candidate-rank">#{rank}</span>
+                            <div>
+                                <strong>{name}</strong><br>
+                                Match Score: <strong>{score}%</strong><br>
+                                <small>Keyword Score: {local_scores.get(name, 0)}{semantic_label(semantic_scores, name)}</small>
                             </div>
-                            """, unsafe_allow_html=True)
-                
-                with col2:
-                    st.markdown("### 📈 Match Percentage Visualization")
-                    fig = create_3d_graph(match_percentages)
-                    st.plotly_chart(fig, use_container_width=True)
-                
-                st.markdown("---")
-                st.markdown("## 🔍 Detailed Analysis")
-                
-                for name, analysis in analysis_results.items():
-                    with st.expander(f"Analysis for {name} ({match_percentages[name]}%)", expanded=False):
-                        st.markdown(f"""
-                        <div class="analysis-results">
-                            {analysis}
                         </div>
-                        """, unsafe_allow_html=True)
-                
-                combined_analysis = "\n\n".join(
-                    [f"=== {name} ===\n{analysis}" for name, analysis in analysis_results.items()]
-                )
-                
-                pdf_report = create_pdf_report(combined_analysis, match_percentages)
-                
+                    </div>
+                    """, unsafe_allow_html=True)
+
+        with col2:
+            st.markdown("### 📈 Match Percentage Visualization")
+            fig = create_3d_graph(match_percentages)
+            st.plotly_chart(fig, use_container_width=True)
+
+        with st.expander("⏱️ Batch Timings", expanded=False):
+            st.caption("Per-stage p50/p95/p99 for this batch: seconds for *_seconds rows, bytes for *_bytes rows")
+            st.dataframe(ranking["metrics"], hide_index=True, use_container_width=True)
+
+        skipped = [name for name in ranking["names"] if name not in analysis_results]
+        if skipped:
+            with st.expander(f"Not ranked by AI ({len(skipped)})", expanded=False):
+                for name in sorted(skipped, key=lambda n: local_scores.get(n, 0), reverse=True):
+                    st.write(f"{name} — Keyword Score: {local_scores.get(name, 0)}{semantic_label(semantic_scores, name)}")
+
+        st.markdown("---")
+        st.markdown("## 🔍 Detailed Analysis")
+
+        for name, analysis in analysis_results.items():
+            score_label = f"{match_percentages[name]}%" if name in match_percentages else "score unavailable"
+            with st.expander(f"Analysis for {name} ({score_label})", expanded=False):
+                info = document_info.get(name)
+                if info:
+                    st.caption(f"Extracted via {info['path']} path"
+                               + (f" • {info['pages']} pages" if info['pages'] else "")
+                               + (f" • pages sent as images: {info['image_pages']}" if info['image_pages'] else ""))
+                st.markdown(f"""
+                <div class="analysis-results">
+                    {analysis}
+                </div>
+                """, unsafe_allow_html=True)
+
+        # The PDF is built once per ranking, in the background, and offered for download when ready
+        if ranking["pdf_report"] is None:
+            start_pdf_report(ranking)
+        report = ranking["pdf_report"]
+        if not report.done():
+            wait_for_pdf_report(report)
+        elif report.exception() is not None:
+            st.error(f"Could not create the PDF report: {report.exception()}")
+        else:
+            try:
+                with open(report.result(), "rb") as f:
+                    report_data = f.read()
+            except FileNotFoundError:
+                # Reports older than REPORT_MAX_AGE_SECONDS are pruned even while a session still shows them
+                report_data = None
+                start_pdf_report(ranking)
+                wait_for_pdf_report(ranking["pdf_report"])
+            if report_data is not None:
                 st.download_button(
                     label="📥 Download Full Analysis Report (PDF)",
-                    data=pdf_report,
-                    file_name=f"candidate_analysis_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf",
+                    data=report_data,
+                    file_name=ranking["report_file_name"],
                     mime="application/pdf",
                     use_container_width=True
                 )
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Metrics:
+    """Thread-safe registry of stage latencies, payload sizes and counters.
+
+    Every sample carries a sequence number, so a batch can take a `mark()`
+    before it starts and summarise only what was recorded since. The last
+    `max_samples` observations per metric are kept for percentiles; counts
+    and sums cover the whole process lifetime.
+    """
+
+    def __init__(self, max_samples=10000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._samples = {}
+        self._totals = {}
+        self._counters = {}
+
+    def observe(self, name, value):
+        with self._lock:
+            self._sequence += 1
+            self._samples.setdefault(name, deque(maxlen=self.max_samples)).append((self._sequence, value))
+            count, total = self._totals.get(name, (0, 0.0))
+            self._totals[name] = (count + 1, total + value)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f"{stage}_seconds", time.perf_counter() - start)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def mark(self):
+        with self._lock:
+            return self._sequence
+
+    def summary(self, since=0):
+        """Per-metric count, mean, p50/p95/p99 and max over the samples recorded after `since`."""
+        with self._lock:
+            samples = {name: [value for sequence, value in values if sequence > since]
+                       for name, values in self._samples.items()}
+        rows = []
+        for name, values in sorted(samples.items()):
+            if not values:
+                continue
+            values = np.asarray(values, dtype=np.float64)
+            p50, p95, p99 = np.percentile(values, [q * 100 for q in QUANTILES])
+            rows.append({
+                "metric": name,
+                "count": len(values),
+                "mean": round(float(values.mean()), 4),
+                "p50": round(float(p50), 4),
+                "p95": round(float(p95), 4),
+                "p99": round(float(p99), 4),
+                "max": round(float(values.max()), 4),
+            })
+        return rows
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def prometheus_text(self, prefix="resume_ranker", extra_counters=None):
+        """Render every metric in the Prometheus text exposition format (summaries and counters)."""
+        with self._lock:
+            samples = {name: [value for _, value in values] for name, values in self._samples.items()}
+            totals = dict(self._totals)
+            counters = dict(self._counters)
+        counters.update(extra_counters or {})
+        lines = []
+        for name in sorted(samples):
+            metric = f"{prefix}_{name}"
+            lines.append(f"# TYPE {metric} summary")
+            values = np.asarray(samples[name], dtype=np.float64)
+            for quantile, value in zip(QUANTILES, np.percentile(values, [q * 100 for q in QUANTILES])):
+                lines.append(f'{metric}{{quantile="{quantile}"}} {value:.6g}')
+            count, total = totals[name]
+            lines.append(f"{metric}_sum {total:.6g}")
+            lines.append(f"{metric}_count {count}")
+        for name in sorted(counters):
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {counters[name]:.6g}")
+        return "\n".join(lines) + "\n"
+
+
+def write_textfile(path, text):
+    # Written to a temporary file and renamed, so a scraper never reads a half-written file
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temporary, path)
+
+
+def start_metrics_server(port, render, host="127.0.0.1"):
+    """Serve `render()` as text/plain on every GET, for Prometheus to scrape."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,172 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+# Text lines are scaled down until they are about this tall; well above what OCR needs to read body text
+TARGET_LINE_HEIGHT_PX = 28
+MIN_SCALE = 0.5
+
+# JPEG qualities tried from smallest to largest; the first that stays this close to the page is used
+JPEG_QUALITIES = (30, 45, 60, 75, 90)
+MIN_PSNR_DB = 30.0
+
+# Gemini downsizes anything larger, so tiles never exceed it
+MAX_TILE_SIDE = 3072
+TILE_GAP_PX = 24
+
+# Grayscale values below this count as ink when cropping and measuring text lines
+INK_LEVEL = 160
+
+# Share of a row's pixels that must be ink for it to be part of a text line; columns and rows
+# inked over more than MAX_INK_SHARE are sidebars, rules or shading rather than text
+MIN_INK_SHARE = 0.005
+MAX_INK_SHARE = 0.5
+
+
+def crop_to_content(image, padding=24):
+    gray = np.asarray(image.convert("L"))
+    rows = np.flatnonzero((gray < INK_LEVEL).any(axis=1))
+    cols = np.flatnonzero((gray < INK_LEVEL).any(axis=0))
+    if not len(rows):
+        return image
+    return image.crop((
+        max(0, cols[0] - padding), max(0, rows[0] - padding),
+        min(image.width, cols[-1] + 1 + padding), min(image.height, rows[-1] + 1 + padding),
+    ))
+
+
+def median_line_height(image):
+    """Median height in pixels of the horizontal bands of text, or None for a blank page.
+
+    Measured by ink density rather than any inked pixel, so a dark sidebar,
+    a vertical rule or scanner speckle does not turn every row into one band.
+    """
+    ink = np.asarray(image.convert("L")) < INK_LEVEL
+    ink = ink[:, ink.mean(axis=0) <= MAX_INK_SHARE]
+    if not ink.shape[1]:
+        return None
+    density = ink.mean(axis=1)
+    ink_rows = (density >= MIN_INK_SHARE) & (density <= MAX_INK_SHARE)
+    # Run lengths of consecutive inked rows are the text line heights
+    edges = np.diff(np.concatenate(([0], ink_rows.astype(np.int8), [0])))
+    heights = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    heights = heights[heights >= 3]
+    return float(np.median(heights)) if len(heights) else None
+
+
+def legible_scale(image):
+    height = median_line_height(image)
+    if not height:
+        return 1.0
+    return min(1.0, max(MIN_SCALE, TARGET_LINE_HEIGHT_PX / height))
+
+
+def binarize(image):
+    # Otsu's threshold: the gray level that best separates ink from paper
+    gray = image.convert("L")
+    histogram = np.asarray(gray.histogram(), dtype=np.float64)
+    levels = np.arange(256)
+    weight = np.cumsum(histogram)
+    mean = np.cumsum(histogram * levels)
+    total_weight, total_mean = weight[-1], mean[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (total_mean * weight - mean * total_weight) ** 2 / (weight * (total_weight - weight))
+    threshold = int(np.nanargmax(between))
+    return gray.point(lambda value: 255 if value > threshold else 0, mode="1")
+
+
+def psnr(reference, candidate):
+    error = np.mean((reference.astype(np.float64) - candidate.astype(np.float64)) ** 2)
+    return float("inf") if error == 0 else 10 * np.log10(255 ** 2 / error)
+
+
+def encode(image, quality=None):
+    """Encode one page; returns (mime type, bytes, JPEG quality used or None)."""
+    buffer = io.BytesIO()
+    if image.mode == "1":
+        # Two-tone pages compress far better losslessly than as JPEG
+        image.save(buffer, format="PNG", optimize=True)
+        return "image/png", buffer.getvalue(), None
+    if quality:
+        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+        return "image/jpeg", buffer.getvalue(), quality
+    reference = np.asarray(image.convert("L"))
+    for quality in JPEG_QUALITIES:
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+        with Image.open(io.BytesIO(buffer.getvalue())) as decoded:
+            if psnr(reference, np.asarray(decoded.convert("L"))) >= MIN_PSNR_DB:
+                break
+    return "image/jpeg", buffer.getvalue(), quality
+
+
+def tile(images, max_side=MAX_TILE_SIDE, gap=TILE_GAP_PX):
+    """Pack pages left to right, top to bottom, into as few images of at most max_side square as fit."""
+    pages = []
+    for image in images:
+        scale = min(1.0, max_side / max(image.size))
+        if scale < 1.0:
+            image = image.resize((int(image.width * scale), int(image.height * scale)), Image.LANCZOS)
+        pages.append(image)
+
+    tiles, shelves = [], []
+    x = y = shelf_height = 0
+    for image in pages:
+        if x and x + image.width > max_side:
+            x, y, shelf_height = 0, y + shelf_height + gap, 0
+        if y + image.height > max_side:
+            tiles.append(shelves)
+            shelves, x, y, shelf_height = [], 0, 0, 0
+        shelves.append((image, x, y))
+        x += image.width + gap
+        shelf_height = max(shelf_height, image.height)
+    tiles.append(shelves)
+
+    combined = []
+    for placements in tiles:
+        if len(placements) == 1:
+            combined.append(placements[0][0])
+            continue
+        width = max(x + image.width for image, x, _ in placements)
+        height = max(y + image.height for image, _, y in placements)
+        mode = "RGB" if any(image.mode == "RGB" for image, _, _ in placements) else "L"
+        canvas = Image.new(mode, (width, height), "white")
+        for image, x, y in placements:
+            canvas.paste(image.convert(mode), (x, y))
+        combined.append(canvas)
+    return combined
+
+
+def prepare_pages(images, grayscale=False, binary=False, crop=True, adaptive=True, tiled=False, quality=None):
+    """Turn rendered pages into (mime type, bytes, info) model inputs using the given settings.
+
+    With `adaptive`, each page is scaled so its text lines are about
+    TARGET_LINE_HEIGHT_PX tall and the lowest JPEG quality within MIN_PSNR_DB
+    of the page is chosen, unless `quality` fixes it.
+    """
+    prepared = []
+    for image in images:
+        if binary or grayscale:
+            image = image.convert("L")
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        if crop:
+            image = crop_to_content(image)
+        if adaptive:
+            scale = legible_scale(image)
+            if scale < 1.0:
+                image = image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))),
+                                     Image.LANCZOS)
+        prepared.append(image)
+    if tiled and len(prepared) > 1:
+        prepared = tile(prepared)
+    # Without adaptive encoding, JPEG quality falls back to PIL's default
+    quality = quality or (None if adaptive else 75)
+    outputs = []
+    for image in prepared:
+        if binary:
+            image = binarize(image)
+        mime_type, data, used_quality = encode(image, quality)
+        outputs.append((mime_type, data, {"size": image.size, "quality": used_quality}))
+    return outputs
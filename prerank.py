@@ -0,0 +1,63 @@
+import re
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+STOP_WORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the to was were will with
+you your we our they their this these those who what which our us can may must should would
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def build_index(documents):
+    # scipy is only needed once a batch is ranked, so it stays out of app start-up
+    from scipy import sparse
+
+    vocabulary = {}
+    rows, cols = [], []
+    lengths = np.zeros(len(documents), dtype=np.float64)
+    for row, text in enumerate(documents):
+        tokens = tokenize(text)
+        lengths[row] = len(tokens)
+        for token in tokens:
+            rows.append(row)
+            cols.append(vocabulary.setdefault(token, len(vocabulary)))
+    # Duplicate (row, col) pairs are summed, giving raw term frequencies
+    term_freqs = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float64), (rows, cols)),
+        shape=(len(documents), len(vocabulary))
+    )
+    term_freqs.sum_duplicates()
+    return vocabulary, term_freqs, lengths
+
+
+def bm25_scores(query, documents, k1=1.5, b=0.75):
+    if not documents:
+        return np.zeros(0)
+    vocabulary, term_freqs, lengths = build_index(documents)
+    query_terms = [vocabulary[token] for token in set(tokenize(query)) if token in vocabulary]
+    if not query_terms:
+        return np.zeros(len(documents))
+
+    tf = term_freqs[:, query_terms].tocsc()
+    doc_freqs = np.diff(tf.indptr)
+    idf = np.log1p((len(documents) - doc_freqs + 0.5) / (doc_freqs + 0.5))
+
+    avg_length = lengths.mean() or 1.0
+    norms = k1 * (1 - b + b * lengths / avg_length)
+    # Apply the saturation only to stored (non-zero) frequencies to keep the matrix sparse
+    tf = tf.tocoo()
+    weights = tf.data * (k1 + 1) / (tf.data + norms[tf.row]) * idf[tf.col]
+    return np.bincount(tf.row, weights=weights, minlength=len(documents))
+
+
+def shortlist(scores, top_k):
+    order = np.argsort(-scores, kind="stable")
+    if top_k and top_k > 0:
+        order = order[:top_k]
+    return [int(i) for i in order]
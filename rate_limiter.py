@@ -0,0 +1,126 @@
+import random
+import threading
+import time
+
+import requests
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate` tokens per second."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount=1, deadline=None):
+        # Requests larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return True
+                wait = (amount - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def release(self, amount=1):
+        # Returns tokens taken for a request that was never sent
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + min(amount, self.capacity))
+
+
+def status_code(exc):
+    # google.api_core exceptions carry the HTTP status as `code`; requests errors carry a response
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_retryable(exc):
+    return status_code(exc) in RETRYABLE_STATUS_CODES or isinstance(
+        exc, (ConnectionError, TimeoutError, requests.ConnectionError, requests.Timeout)
+    )
+
+
+class RequestScheduler:
+    """Runs model calls under requests/minute and tokens/minute quotas with retries.
+
+    Callers block in the token buckets until quota is available, so a batch
+    queues up at the quota ceiling instead of failing. Retryable errors
+    (429/5xx, connection problems) are retried with jittered exponential
+    backoff until `max_retries` or the per-request deadline is reached.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, max_retries=5,
+                 base_delay=1.0, max_delay=32.0, deadline_seconds=120.0):
+        self.request_bucket = TokenBucket(requests_per_minute / 60.0, max(1, requests_per_minute // 6))
+        self.token_bucket = TokenBucket(tokens_per_minute / 60.0, max(1, tokens_per_minute // 6))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline_seconds = deadline_seconds
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "throttled_seconds": 0.0}
+        self._stats_lock = threading.Lock()
+
+    def _record(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _acquire(self, estimated_tokens, deadline):
+        start = time.monotonic()
+        acquired = self.request_bucket.acquire(1, deadline)
+        if acquired and not self.token_bucket.acquire(estimated_tokens, deadline):
+            # The request is never sent, so it must not use up request quota either
+            self.request_bucket.release(1)
+            acquired = False
+        self._record("throttled_seconds", time.monotonic() - start)
+        if not acquired:
+            raise TimeoutError("Request deadline exceeded while waiting for rate limit quota")
+
+    def run(self, call, estimated_tokens=1, on_retry=None):
+        """Invoke `call(timeout)` and return its result, retrying transient failures.
+
+        `timeout` is the number of seconds left before the request deadline.
+        `on_retry(exc)`, if given, is called before every retry.
+        """
+        deadline = time.monotonic() + self.deadline_seconds
+        attempt = 0
+        while True:
+            try:
+                self._acquire(estimated_tokens, deadline)
+            except TimeoutError:
+                self._record("failures")
+                raise
+            self._record("requests")
+            try:
+                return call(max(deadline - time.monotonic(), 0.001))
+            except Exception as exc:
+                if not is_retryable(exc) or attempt >= self.max_retries:
+                    self._record("failures")
+                    raise
+                # Full jitter keeps concurrent workers from retrying in lockstep
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                if time.monotonic() + delay >= deadline:
+                    self._record("failures")
+                    raise
+                attempt += 1
+                self._record("retries")
+                if on_retry:
+                    on_retry(exc)
+                time.sleep(delay)
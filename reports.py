@@ -0,0 +1,295 @@
+import re
+import zlib
+from datetime import datetime
+from functools import lru_cache
+
+# A4 in points
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+MARGIN = 56
+TEXT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+
+# Resource name, PDF base font and fpdf metrics table for the two standard fonts used
+FONTS = {
+    "regular": ("F1", "Helvetica", "helvetica"),
+    "bold": ("F2", "Helvetica-Bold", "helveticaB"),
+}
+
+# Columns of the ranked score table: (title, x offset, width)
+TABLE_COLUMNS = [("Rank", 0, 40), ("Candidate", 40, 323), ("Match score", 363, 70), ("Page", 433, 50)]
+
+MARKDOWN_EMPHASIS = re.compile(r"\*\*|__|`")
+
+
+def encode_text(text):
+    # The standard PDF fonts cover Windows-1252; anything else is replaced
+    return text.encode("cp1252", "replace")
+
+
+@lru_cache(maxsize=None)
+def char_widths(font):
+    from fpdf.fonts import fpdf_charwidths
+
+    # Glyph widths in thousandths of the font size, indexed by Windows-1252 byte
+    widths = fpdf_charwidths[FONTS[font][2]]
+    return tuple(widths[chr(byte)] for byte in range(256))
+
+
+def text_width(data, font, size):
+    return sum(map(char_widths(font).__getitem__, data)) * size / 1000
+
+
+def escape(data):
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").replace(b"\r", b"")
+
+
+def wrap(data, font, size, width=TEXT_WIDTH):
+    widths = char_widths(font)
+    limit = width * 1000 / size
+    lines = []
+    line, line_width = None, 0
+    for word in data.split(b" "):
+        word_width = sum(map(widths.__getitem__, word))
+        if line is not None and line_width + widths[32] + word_width <= limit:
+            line += b" " + word
+            line_width += widths[32] + word_width
+            continue
+        if line is not None:
+            lines.append(line)
+        # Words wider than the page (URLs, long tokens) are broken wherever they overflow
+        while word_width > limit:
+            cut, used = 0, 0
+            while cut < len(word) - 1 and used + widths[word[cut]] <= limit:
+                used += widths[word[cut]]
+                cut += 1
+            cut = max(cut, 1)
+            lines.append(word[:cut])
+            word = word[cut:]
+            word_width = sum(map(widths.__getitem__, word))
+        line, line_width = word, word_width
+    lines.append(line)
+    return lines
+
+
+def truncate(data, font, size, width):
+    if text_width(data, font, size) <= width:
+        return data
+    widths = char_widths(font)
+    limit = width * 1000 / size - 3 * widths[ord(".")]
+    used = 0
+    for cut, byte in enumerate(data):
+        used += widths[byte]
+        if used > limit:
+            return data[:cut] + b"..."
+    return data
+
+
+class PDFStream:
+    """Minimal PDF writer that appends every finished page straight to a file.
+
+    Only object byte offsets and page object numbers stay in memory, so the
+    cost of a report grows with its page count by a few integers, not by its
+    content. The page tree is written last by `close()`, and its order is
+    independent of the order pages were written in, which lets front matter
+    that is rendered after the body still come first.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.position = 0
+        # Object numbers are offsets indexes; 1 and 2 are reserved for the catalog and the page tree
+        self.offsets = [None, None, None]
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        fonts = b" ".join(
+            b"/%s %d 0 R" % (resource.encode(), self._object(
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % base_font.encode()
+            ))
+            for resource, base_font, _ in FONTS.values()
+        )
+        self.resources = self._object(b"<< /Font << %s >> >>" % fonts)
+
+    def _write(self, data):
+        self.f.write(data)
+        self.position += len(data)
+
+    def _object(self, body, number=None):
+        if number is None:
+            self.offsets.append(None)
+            number = len(self.offsets) - 1
+        self.offsets[number] = self.position
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        return number
+
+    def add_page(self, content, links=()):
+        """Write one page; `links` are (rect, target page object) pairs. Returns the page object number."""
+        data = zlib.compress(content)
+        stream = self._object(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(data), data))
+        annotations = b" ".join(
+            b"<< /Type /Annot /Subtype /Link /Rect [%.2f %.2f %.2f %.2f] /Border [0 0 0] /Dest [%d 0 R /Fit] >>"
+            % (*rect, target) for rect, target in links
+        )
+        return self._object(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] /Resources %d 0 R /Contents %d 0 R /Annots [%s] >>"
+            % (PAGE_WIDTH, PAGE_HEIGHT, self.resources, stream, annotations)
+        )
+
+    def close(self, pages, outline=(), title=""):
+        """Write the page tree in `pages` order, bookmarks for (title, page) `outline` entries, and the trailer."""
+        outline = list(outline)
+        outline_root = None
+        if outline:
+            outline_root = len(self.offsets)
+            self.offsets.extend([None] * (len(outline) + 1))
+            for i, (text, page) in enumerate(outline):
+                number = outline_root + 1 + i
+                siblings = b""
+                if i:
+                    siblings += b" /Prev %d 0 R" % (number - 1)
+                if i < len(outline) - 1:
+                    siblings += b" /Next %d 0 R" % (number + 1)
+                self._object(
+                    b"<< /Title (%s) /Parent %d 0 R%s /Dest [%d 0 R /Fit] >>"
+                    % (escape(encode_text(text)), outline_root, siblings, page), number
+                )
+            self._object(b"<< /Type /Outlines /First %d 0 R /Last %d 0 R /Count %d >>"
+                         % (outline_root + 1, outline_root + len(outline), len(outline)), outline_root)
+        kids = b" ".join(b"%d 0 R" % page for page in pages)
+        self._object(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(pages)), 2)
+        catalog = b"<< /Type /Catalog /Pages 2 0 R"
+        if outline_root:
+            catalog += b" /Outlines %d 0 R /PageMode /UseOutlines" % outline_root
+        self._object(catalog + b" >>", 1)
+        info = self._object(b"<< /Title (%s) /Producer (AI Resume Ranker) /CreationDate (D:%s) >>"
+                            % (escape(encode_text(title)), datetime.now().strftime("%Y%m%d%H%M%S").encode()))
+        xref = self.position
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % len(self.offsets))
+        for offset in self.offsets[1:]:
+            self._write(b"%010d 00000 n \n" % offset)
+        self._write(b"trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (len(self.offsets), info, xref))
+
+
+class PageLayout:
+    """Places lines of text top to bottom, starting a new page when one fills up.
+
+    Each page is handed to the writer as soon as it is full; with no writer
+    pages are only counted, which is how the front matter is measured before
+    the body is rendered.
+    """
+
+    def __init__(self, pdf=None, first_page_number=1):
+        self.pdf = pdf
+        self.first_page_number = first_page_number
+        self.pages = []
+        self.page_count = 0
+        self._ops = []
+        self._links = []
+        self.y = None
+
+    def new_page(self):
+        self.flush()
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def flush(self):
+        if self.y is None:
+            return
+        if self.pdf:
+            footer = b"Page %d" % (self.first_page_number + self.page_count)
+            self.text(PAGE_WIDTH - MARGIN - text_width(footer, "regular", 8), MARGIN / 2, footer, "regular", 8)
+            self.pages.append(self.pdf.add_page(b"\n".join(self._ops), self._links))
+        self.page_count += 1
+        self._ops, self._links = [], []
+        self.y = None
+
+    def advance(self, height):
+        # Returns the baseline for a line of this height, on a new page if it no longer fits
+        if self.y is None or self.y - height < MARGIN:
+            self.new_page()
+        self.y -= height
+        return self.y
+
+    def text(self, x, y, data, font, size):
+        if self.pdf:
+            self._ops.append(b"BT /%s %d Tf %.2f %.2f Td (%s) Tj ET"
+                             % (FONTS[font][0].encode(), size, x, y, escape(data)))
+
+    def link(self, rect, target):
+        if self.pdf:
+            self._links.append((rect, target))
+
+    def paragraph(self, text, font="regular", size=11):
+        for line in wrap(encode_text(text), font, size):
+            self.text(MARGIN, self.advance(size * 1.4), line, font, size)
+
+    def space(self, height):
+        if self.y is not None and self.y - height >= MARGIN:
+            self.y -= height
+
+
+def table_header(layout):
+    y = layout.advance(16)
+    for heading, offset, _ in TABLE_COLUMNS:
+        layout.text(MARGIN + offset, y, encode_text(heading), "bold", 10)
+
+
+def render_front_matter(layout, title, entries, subtitle):
+    layout.new_page()
+    layout.paragraph(title, "bold", 18)
+    layout.paragraph(subtitle, "regular", 10)
+    layout.space(12)
+    layout.paragraph("Ranked candidates", "bold", 13)
+    layout.space(4)
+    table_header(layout)
+    for rank, name, score, first_page, target in entries:
+        if layout.y - 16 < MARGIN:
+            # The column headings are repeated at the top of every table page
+            table_header(layout)
+        y = layout.advance(16)
+        cells = [str(rank), name, f"{score}%" if score is not None else "n/a", str(first_page)]
+        for text, (_, offset, width) in zip(cells, TABLE_COLUMNS):
+            layout.text(MARGIN + offset, y, truncate(encode_text(text), "regular", 10, width - 6), "regular", 10)
+        # Each row links to the candidate's first page
+        layout.link((MARGIN, y - 4, MARGIN + TEXT_WIDTH, y + 12), target)
+    layout.flush()
+
+
+def write_pdf_report(path, candidates, title="Resume Analysis Report"):
+    """Write a PDF for `candidates`, a sequence of (name, score, analysis) tuples, best first.
+
+    The report opens with a ranked score table that doubles as a linked table
+    of contents, followed by one section per candidate starting on its own
+    page. Pages are written to `path` as they are laid out, so memory use does
+    not grow with the size of the report.
+    """
+    subtitle = f"Generated {datetime.now():%Y-%m-%d %H:%M} - {len(candidates)} candidates"
+    # The table's length only depends on the number of candidates, so it can be measured up front
+    measured = PageLayout()
+    render_front_matter(measured, title, [(0, "", 0, 0, 0)] * len(candidates), subtitle)
+    front_pages = measured.page_count
+
+    entries = []
+    with open(path, "wb") as f:
+        pdf = PDFStream(f)
+        body = PageLayout(pdf, first_page_number=front_pages + 1)
+        for rank, (name, score, analysis) in enumerate(candidates, 1):
+            body.new_page()
+            first_page = front_pages + body.page_count + 1
+            score_label = f"{score}%" if score is not None else "score unavailable"
+            body.paragraph(f"{rank}. {name} ({score_label})", "bold", 14)
+            body.space(6)
+            for line in (analysis or "").splitlines():
+                line = MARKDOWN_EMPHASIS.sub("", line).rstrip()
+                if line.startswith("#"):
+                    body.space(4)
+                    body.paragraph(line.lstrip("#").strip(), "bold", 12)
+                elif line:
+                    body.paragraph(line)
+                else:
+                    body.space(6)
+            body.flush()
+            entries.append((rank, name, score, first_page, body.pages[first_page - front_pages - 1]))
+
+        front = PageLayout(pdf)
+        render_front_matter(front, title, entries, subtitle)
+        pdf.close(front.pages + body.pages, [(f"{rank}. {name}", target) for rank, name, _, _, target in entries], title)
+    return path
@@ -0,0 +1,32 @@
+import json
+import time
+
+from sqlite_store import SQLiteStore
+
+
+class RequisitionStore(SQLiteStore):
+    """Persistent per-requisition record of every candidate seen, keyed by resume content hash."""
+
+    TABLE = "candidates"
+    COLUMNS = ("requisition TEXT NOT NULL, resume_hash TEXT NOT NULL, record TEXT NOT NULL, text TEXT NOT NULL,"
+               " updated REAL NOT NULL, PRIMARY KEY (requisition, resume_hash)")
+
+    def load(self, requisition):
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT resume_hash, record, text FROM candidates WHERE requisition = ?", (requisition,)
+            ).fetchall()
+        return {resume_hash: {"record": json.loads(record), "text": text} for resume_hash, record, text in rows}
+
+    def save(self, requisition, resume_hash, record, text):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO candidates (requisition, resume_hash, record, text, updated) VALUES (?, ?, ?, ?, ?)",
+                (requisition, resume_hash, json.dumps(record), text, time.time())
+            )
+
+    def clear(self, requisition=None):
+        if requisition is None:
+            return super().clear()
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM candidates WHERE requisition = ?", (requisition,))
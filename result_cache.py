@@ -0,0 +1,61 @@
+import hashlib
+import time
+
+from sqlite_store import SQLiteStore
+
+
+def make_cache_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        # Length prefix keeps ("ab", "c") and ("a", "bc") from colliding
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class ResultCache(SQLiteStore):
+    """Persistent SQLite key/value cache with LRU eviction, TTL expiry and a size cap."""
+
+    TABLE = "entries"
+    COLUMNS = "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL"
+
+    def __init__(self, path, max_bytes=100 * 1024 * 1024, ttl_seconds=7 * 24 * 3600):
+        super().__init__(path, max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            value = row[0]
+            return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def set(self, key, value):
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now)
+            )
+            if self.ttl_seconds:
+                conn.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl_seconds,))
+            self._evict(conn)
+
+    def stats(self):
+        with self._lock, self._connect() as conn:
+            entries, size = self._size(conn)
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
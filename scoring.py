@@ -0,0 +1,1324 @@
+from dotenv import load_dotenv
+import atexit
+import base64
+import os
+import io
+import json
+import logging
+import mimetypes
+import re
+import subprocess
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+import multiprocessing
+from concurrent.futures.process import BrokenProcessPool
+import threading
+import time
+from datetime import timedelta
+from functools import lru_cache, wraps
+import numpy as np
+from result_cache import ResultCache, make_cache_key
+from prerank import bm25_scores, shortlist
+from chunking import CHARS_PER_TOKEN, chunk_document
+from rate_limiter import RequestScheduler
+from requisition_store import RequisitionStore
+from document_store import DocumentStore
+from activity_log import ActivityLog
+from metrics import Metrics, start_metrics_server, write_textfile
+from vector_index import VectorIndex
+from semantic import EmbeddingCache, embed_texts, requirement_coverage, split_requirements, to_percentage
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Optional overrides, e.g. GEMINI_TRANSPORT=rest with a local stub endpoint for benchmarking
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT") or None
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT") or None
+
+# Maximum number of resumes extracted and scored at the same time
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "8"))
+
+# Processes used to extract uploaded documents (0 uses one per CPU core up to 4, 1 extracts in-process).
+# The pool is shared by every session of the app, so the default leaves cores for the server itself.
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+
+# Number of resumes, ranked locally with BM25, that are sent on to the model (0 sends all)
+PRERANK_TOP_K = int(os.getenv("PRERANK_TOP_K", "20"))
+
+MODEL_NAME = "gemini-1.5-flash"
+
+# Schema the model must follow for the match prompt, so the score never has to be scraped from prose
+MATCH_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "integer"},
+        "missing_keywords": {"type": "array", "items": {"type": "string"}},
+        "summary": {"type": "string"},
+    },
+    "required": ["score", "missing_keywords", "summary"],
+}
+
+# Condensed job description used in place of the full text when batch ranking
+JOB_REQUIREMENTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "must_have": {"type": "array", "items": {"type": "string"}},
+        "nice_to_have": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["title", "must_have", "nice_to_have"],
+}
+
+# "All reports" mode asks for the three applicant reports in a single structured request
+ALL_REPORTS_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "analysis": {"type": "string"},
+        "match": MATCH_RESPONSE_SCHEMA,
+        "keyword_analysis": {"type": "string"},
+    },
+    "required": ["analysis", "match", "keyword_analysis"],
+}
+
+REPORT_TITLES = {
+    "analysis": "Comprehensive Analysis",
+    "match": "Match Score",
+    "keyword_analysis": "Keyword Analysis",
+}
+
+# Generation settings per prompt; scoring runs at temperature 0 so repeat runs agree
+GENERATION_CONFIGS = {
+    "analysis": {"temperature": 0.4},
+    "match": {
+        "temperature": 0.0,
+        "response_mime_type": "application/json",
+        "response_schema": MATCH_RESPONSE_SCHEMA,
+    },
+    "keyword_analysis": {"temperature": 0.2},
+    "chunk_notes": {"temperature": 0.0},
+    "job_requirements": {
+        "temperature": 0.0,
+        "response_mime_type": "application/json",
+        "response_schema": JOB_REQUIREMENTS_SCHEMA,
+    },
+    "all_reports": {
+        "temperature": 0.2,
+        "response_mime_type": "application/json",
+        "response_schema": ALL_REPORTS_RESPONSE_SCHEMA,
+    },
+}
+
+# PDF rasterization settings for image-based resumes
+RASTER_DPI = int(os.getenv("RASTER_DPI", "200"))
+RASTER_GRAYSCALE = os.getenv("RASTER_GRAYSCALE", "false").lower() == "true"
+
+# Page images are cropped to their content and, when adaptive, scaled so text lines stay legible and
+# encoded at the lowest JPEG quality that keeps the page faithful (RASTER_JPEG_QUALITY=0 picks it).
+# Binarized pages are sent as two-tone PNGs; tiling packs several scanned pages into one image.
+RASTER_CROP = os.getenv("RASTER_CROP", "true").lower() == "true"
+# Off until its score drift is measured with benchmarks/image_payload_benchmark.py --jd
+RASTER_ADAPTIVE = os.getenv("RASTER_ADAPTIVE", "false").lower() == "true"
+RASTER_JPEG_QUALITY = int(os.getenv("RASTER_JPEG_QUALITY", "0"))
+RASTER_BINARIZE = os.getenv("RASTER_BINARIZE", "false").lower() == "true"
+RASTER_TILE_PAGES = os.getenv("RASTER_TILE_PAGES", "false").lower() == "true"
+
+# PDF pages with less extracted text than this are treated as scans and sent as images
+MIN_PAGE_TEXT_CHARS = int(os.getenv("MIN_PAGE_TEXT_CHARS", "50"))
+MAX_IMAGE_PAGES = int(os.getenv("MAX_IMAGE_PAGES", "3"))
+
+# On-disk cache of model responses, keyed by resume bytes, job description, prompt and model
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", ".cache/results.sqlite3")
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", "100"))
+RESULT_CACHE_TTL_HOURS = int(os.getenv("RESULT_CACHE_TTL_HOURS", "168"))
+
+# Local sentence-embedding model for the semantic match score. Needs the optional
+# sentence-transformers package; an empty value turns semantic scoring off.
+SEMANTIC_MODEL = os.getenv("SEMANTIC_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3")
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "200"))
+
+# Embeddings of every processed resume, searched when a new job description is matched against the archive
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", ".cache/vector_index.sqlite3")
+
+# Extracted text and page images by file content, so re-uploaded resumes skip poppler and python-docx
+DOCUMENT_STORE_PATH = os.getenv("DOCUMENT_STORE_PATH", ".cache/documents.sqlite3")
+DOCUMENT_STORE_MAX_MB = int(os.getenv("DOCUMENT_STORE_MAX_MB", "500"))
+
+# Per-requisition record of scored candidates, so re-ranking only evaluates new or changed resumes
+REQUISITION_STORE_PATH = os.getenv("REQUISITION_STORE_PATH", ".cache/requisitions.sqlite3")
+
+# Stage timings and payload sizes in Prometheus text format, written after every batch;
+# METRICS_PORT additionally serves them over HTTP for scraping (0 disables), on METRICS_HOST only
+METRICS_PATH = os.getenv("METRICS_PATH", ".cache/metrics.prom")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# JSON lines record of user actions, written by a background thread and rotated by size or age
+ACTIVITY_LOG_PATH = os.getenv("ACTIVITY_LOG_PATH", "user_activity_log.jsonl")
+ACTIVITY_LOG_MAX_MB = int(os.getenv("ACTIVITY_LOG_MAX_MB", "10"))
+ACTIVITY_LOG_ROTATE_HOURS = float(os.getenv("ACTIVITY_LOG_ROTATE_HOURS", "24"))
+ACTIVITY_LOG_BACKUPS = int(os.getenv("ACTIVITY_LOG_BACKUPS", "5"))
+
+# Quotas and retry policy for model calls
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "60"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "5"))
+GEMINI_DEADLINE_SECONDS = float(os.getenv("GEMINI_DEADLINE_SECONDS", "120"))
+
+# Gemini bills each image as a fixed number of tokens; text is roughly four characters per token
+IMAGE_TOKENS = 258
+
+# Estimated input tokens allowed per model request. Longer documents are split into chunks that fit,
+# evaluated in parallel, and the prompt is answered from the merged notes (0, the default, sends documents
+# whole; the model's context window holds any resume, so set it only to cap the cost of very long ones).
+REQUEST_TOKEN_BUDGET = int(os.getenv("REQUEST_TOKEN_BUDGET", "0"))
+# Rounds of chunk notes taken before giving up on fitting the budget
+MAX_CHUNK_ROUNDS = 3
+
+# Batch ranking condenses the job description once into a short requirement list, cached by content,
+# and sends that with every resume instead of the full text (false sends the full text)
+CONDENSE_JOB_DESCRIPTION = os.getenv("CONDENSE_JOB_DESCRIPTION", "true").lower() == "true"
+
+# Gemini context caching keeps a job description server-side for a whole batch, but only for contents
+# of at least this many tokens and on versioned models; shorter ones are sent inline (0 disables).
+# Every request for a job description that long goes to CONTEXT_CACHE_MODEL, cached or not.
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "32768"))
+CONTEXT_CACHE_MODEL = os.getenv("CONTEXT_CACHE_MODEL", f"models/{MODEL_NAME}-002")
+CONTEXT_CACHE_TTL_MINUTES = 60
+
+DOCX_MIME_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Prompts for Gemini AI
+prompts = {
+    "analysis": """
+    You are an experienced Technical Human Resource Manager. Review the provided resume against the job description.
+    Provide a detailed professional evaluation, highlighting strengths and weaknesses in relation to the specified job requirements.
+    """,
+    "match": """
+    You are a skilled ATS (Applicant Tracking System) scanner. Evaluate the resume against the provided job description.
+    Respond with a JSON object containing "score" (the percentage match as an integer from 0 to 100),
+    "missing_keywords" (a list of important job description keywords missing from the resume)
+    and "summary" (your final thoughts in a short paragraph).
+    """,
+    "keyword_analysis": """
+    You are an advanced AI-powered career consultant. Analyze the job description and the uploaded resume to identify critical keywords.
+    List the most important keywords from the job description that are missing in the resume and suggest areas for improvement.
+    """,
+    "all_reports": """
+    You are an experienced Technical Human Resource Manager, ATS (Applicant Tracking System) scanner and career consultant.
+    Review the resume against the job description and respond with a JSON object containing three reports:
+    "analysis": a detailed professional evaluation highlighting strengths and weaknesses in relation to the job requirements;
+    "match": an object with "score" (the percentage match as an integer from 0 to 100), "missing_keywords"
+    (a list of important job description keywords missing from the resume) and "summary" (your final thoughts);
+    "keyword_analysis": the most important keywords from the job description that are missing in the resume,
+    with suggested areas for improvement.
+    """,
+    "chunk_notes": """
+    You are an experienced Technical Human Resource Manager. You are given one part of a longer resume;
+    the other parts are reviewed separately. List, as concise bullet points, everything in this part that is
+    relevant to the job description: skills, technologies, roles and their dates, qualifications and achievements.
+    Keep names, numbers and dates exactly as written. Do not score the candidate or comment on what this part lacks.
+    """,
+    "job_requirements": """
+    You are an experienced Technical Recruiter. Condense the job description above into what a resume is screened against.
+    Respond with a JSON object containing "title" (the job title), "must_have" (a list of the required skills, technologies,
+    qualifications and years of experience) and "nice_to_have" (a list of the preferred or optional ones).
+    Keep every item short, keep technology names and numbers exactly as written, and leave out the company description,
+    benefits and application instructions.
+    """
+}
+
+# Replaces the resume in the final request when it was evaluated in chunks
+CHUNK_NOTES_HEADER = (
+    "The resume was too long to review in one request. Below are notes taken from each of its {parts} parts, "
+    "in order; treat them as the full resume."
+)
+
+class LocalFile:
+    # Minimal stand-in for Streamlit's UploadedFile so files on disk go through the same code paths
+    def __init__(self, name, data, type=None):
+        self.name = name
+        self.type = type or mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self._data = data
+
+    @classmethod
+    def from_path(cls, path):
+        with open(path, "rb") as f:
+            return cls(os.path.basename(path), f.read())
+
+    def getvalue(self):
+        return self._data
+
+class ArchivedResume:
+    # A resume found in the vector index. Its extracted document comes from the document store,
+    # and the store key stands in for the file bytes in cache and requisition keys.
+    type = "application/x-archived-resume"
+
+    def __init__(self, name, key):
+        self.name = name
+        self.key = key
+
+    def getvalue(self):
+        return self.key.encode("utf-8")
+
+def shared_resource(func):
+    # lru_cache alone lets concurrent first calls from worker threads build separate instances
+    lock = threading.Lock()
+    cached = lru_cache(maxsize=None)(func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with lock:
+            return cached(*args, **kwargs)
+
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+# The Gemini SDK takes most of a second to import, so configuring it only records the settings;
+# the SDK is imported and configured on the first model call, not when the page first renders
+GEMINI_SETTINGS = {}
+
+def configure_gemini(api_key, transport=GEMINI_TRANSPORT, api_endpoint=GEMINI_API_ENDPOINT):
+    settings = {
+        "api_key": api_key,
+        "transport": transport,
+        "client_options": {"api_endpoint": api_endpoint} if api_endpoint else None,
+    }
+    if settings != GEMINI_SETTINGS:
+        GEMINI_SETTINGS.clear()
+        GEMINI_SETTINGS.update(settings)
+        # Everything built with the previous key or endpoint is dropped and rebuilt on the next call
+        get_genai.cache_clear()
+        get_model.cache_clear()
+        get_cached_model.cache_clear()
+        with CONTEXT_CACHE_LOCK:
+            CONTEXT_CACHES.clear()
+    return True
+
+# Configuring the SDK resets its clients, so do it once per process and again only when the settings change
+@shared_resource
+def get_genai():
+    import google.generativeai as genai
+    genai.configure(**GEMINI_SETTINGS)
+    return genai
+
+@shared_resource
+def get_result_cache():
+    return ResultCache(
+        RESULT_CACHE_PATH,
+        max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024,
+        ttl_seconds=RESULT_CACHE_TTL_HOURS * 3600
+    )
+
+@shared_resource
+def get_metrics():
+    return Metrics()
+
+def metrics_text():
+    scheduler_stats = get_scheduler().stats
+    result_cache = get_result_cache()
+    return get_metrics().prometheus_text(extra_counters={
+        "model_requests": scheduler_stats["requests"],
+        "model_retries": scheduler_stats["retries"],
+        "model_failures": scheduler_stats["failures"],
+        "throttled_seconds": scheduler_stats["throttled_seconds"],
+        "result_cache_hits": result_cache.hits,
+        "result_cache_misses": result_cache.misses,
+        "document_store_hits": get_document_store().hits,
+    })
+
+def export_metrics():
+    if METRICS_PATH:
+        try:
+            write_textfile(METRICS_PATH, metrics_text())
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {METRICS_PATH}: {str(e)}")
+
+@shared_resource
+def start_metrics_endpoint():
+    return start_metrics_server(METRICS_PORT, metrics_text, METRICS_HOST) if METRICS_PORT else None
+
+@shared_resource
+def get_activity_log():
+    if not ACTIVITY_LOG_PATH:
+        return None
+    activity_log = ActivityLog(
+        ACTIVITY_LOG_PATH,
+        max_bytes=ACTIVITY_LOG_MAX_MB * 1024 * 1024,
+        rotate_seconds=ACTIVITY_LOG_ROTATE_HOURS * 3600,
+        backups=ACTIVITY_LOG_BACKUPS
+    )
+    # Queued records are written out before the process exits
+    atexit.register(activity_log.close)
+    return activity_log
+
+@shared_resource
+def get_document_store():
+    # Archived resumes cannot be re-scored without their stored documents, so evicting one drops it from the archive
+    return DocumentStore(DOCUMENT_STORE_PATH, max_bytes=DOCUMENT_STORE_MAX_MB * 1024 * 1024,
+                         on_evict=lambda keys: get_vector_index().remove(keys))
+
+@shared_resource
+def get_embedding_cache():
+    return EmbeddingCache(EMBEDDING_CACHE_PATH, max_bytes=EMBEDDING_CACHE_MAX_MB * 1024 * 1024)
+
+@shared_resource
+def get_vector_index():
+    return VectorIndex(VECTOR_INDEX_PATH)
+
+@shared_resource
+def get_embedder():
+    if not SEMANTIC_MODEL:
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.info("sentence-transformers is not installed; semantic scores are disabled")
+        return None
+    return SentenceTransformer(SEMANTIC_MODEL, device="cpu")
+
+@shared_resource
+def get_requisition_store():
+    return RequisitionStore(REQUISITION_STORE_PATH)
+
+@shared_resource
+def get_scheduler():
+    return RequestScheduler(
+        GEMINI_RPM,
+        GEMINI_TPM,
+        max_retries=GEMINI_MAX_RETRIES,
+        deadline_seconds=GEMINI_DEADLINE_SECONDS
+    )
+
+def estimate_tokens(contents):
+    tokens = 0
+    for item in contents:
+        if isinstance(item, str):
+            tokens += len(item) // CHARS_PER_TOKEN
+        elif item["mime_type"].startswith("image/"):
+            tokens += IMAGE_TOKENS
+        else:
+            tokens += len(item["data"]) // CHARS_PER_TOKEN
+    return max(tokens, 1)
+
+# Model instances are shared across reruns and worker threads, one per model and generation config
+@shared_resource
+def get_model(prompt_key=None, model_name=MODEL_NAME):
+    return get_genai().GenerativeModel(model_name, generation_config=GENERATION_CONFIGS.get(prompt_key))
+
+def uses_context_cache(input_text):
+    return bool(CONTEXT_CACHE_MIN_TOKENS) and estimate_tokens([input_text]) >= CONTEXT_CACHE_MIN_TOKENS
+
+def answering_model(input_text):
+    # The model that answers every request for this job description, so cached answers are keyed by it
+    return CONTEXT_CACHE_MODEL if uses_context_cache(input_text) else MODEL_NAME
+
+# Cached contents by job description hash, with the time they expire, shared by every session's batches.
+# While one is being created its entry is an Event that other requests for it wait on.
+CONTEXT_CACHES = {}
+CONTEXT_CACHE_LOCK = threading.Lock()
+
+def get_context_cache(input_text):
+    """Server-side cached content holding `input_text`, or None when it is too short to cache or caching failed."""
+    if not uses_context_cache(input_text):
+        return None
+    key = make_cache_key(input_text, CONTEXT_CACHE_MODEL)
+    while True:
+        with CONTEXT_CACHE_LOCK:
+            entry = CONTEXT_CACHES.get(key, (None, 0.0))
+            if not isinstance(entry, threading.Event):
+                cached, expires = entry
+                # Renewed a few minutes early so requests in flight never reference an expired cache
+                if time.monotonic() < expires - 300:
+                    return cached
+                creating = CONTEXT_CACHES[key] = threading.Event()
+                break
+        # Concurrent requests of one batch share the cache another thread is creating
+        entry.wait()
+    cached = None
+    try:
+        cached = get_genai().caching.CachedContent.create(
+            model=CONTEXT_CACHE_MODEL,
+            contents=[input_text],
+            ttl=timedelta(minutes=CONTEXT_CACHE_TTL_MINUTES)
+        )
+    except Exception as e:
+        # Not retried until the TTL has passed; requests send the job description inline meanwhile
+        logger.warning(f"Context caching unavailable, sending the job description with every request: {str(e)}")
+    finally:
+        with CONTEXT_CACHE_LOCK:
+            # Unless configure_gemini dropped the entry meanwhile
+            if CONTEXT_CACHES.get(key) is creating:
+                CONTEXT_CACHES[key] = (cached, time.monotonic() + CONTEXT_CACHE_TTL_MINUTES * 60)
+        creating.set()
+    return cached
+
+@shared_resource
+def get_cached_model(cached_content_name, prompt_key=None):
+    return get_genai().GenerativeModel.from_cached_content(
+        cached_content_name, generation_config=GENERATION_CONFIGS.get(prompt_key)
+    )
+
+def to_model_content(part):
+    # The SDK base64-decodes blob data, so extracted text has to be sent as a plain string
+    if part["mime_type"] == "text/plain":
+        return part["data"]
+    return part
+
+def request_model(input_text, pdf_content, prompt, prompt_key=None, stream=False):
+    contents = [*(to_model_content(part) for part in pdf_content), prompt]
+    cached = get_context_cache(input_text)
+    if cached:
+        # The job description is held server-side; only the resume and the prompt are sent
+        model = get_cached_model(cached.name, prompt_key)
+    else:
+        model = get_model(prompt_key, answering_model(input_text))
+        contents.insert(0, input_text)
+    metrics = get_metrics()
+    metrics.observe("model_request_bytes", sum(
+        len(item) if isinstance(item, str) else len(item["data"]) for item in contents
+    ))
+    retries = []
+    try:
+        return get_scheduler().run(
+            # Retries are handled by the scheduler so every attempt is counted against the quota
+            lambda timeout: model.generate_content(
+                contents, stream=stream, request_options={"timeout": timeout, "retry": None}
+            ),
+            # Cached tokens still count against the per-minute token quota
+            estimate_tokens([input_text, *contents] if cached else contents),
+            on_retry=retries.append
+        )
+    finally:
+        metrics.observe("model_retries_per_request", len(retries))
+
+def get_gemini_response(input_text, pdf_content, prompt, prompt_key=None):
+    metrics = get_metrics()
+    try:
+        with metrics.timer("model_request"):
+            text = request_model(input_text, pdf_content, prompt, prompt_key).text
+        metrics.observe("model_response_bytes", len(text))
+        return text
+    except Exception as e:
+        metrics.increment("model_errors")
+        logger.error(f"Error generating response: {str(e)}")
+        return None
+
+def stream_gemini_response(input_text, pdf_content, prompt, prompt_key=None):
+    # Only the initial request is retried; an error part-way through the stream is raised to the caller
+    metrics = get_metrics()
+    size = 0
+    with metrics.timer("model_request"):
+        for chunk in request_model(input_text, pdf_content, prompt, prompt_key, stream=True):
+            if chunk.parts:
+                size += len(chunk.text)
+                yield chunk.text
+    metrics.observe("model_response_bytes", size)
+
+def add_timing(timings, stage, start):
+    # Extraction runs in pool workers, so stage timings travel back to the parent inside the document info
+    if timings is not None:
+        timings[stage] = round(timings.get(stage, 0.0) + time.perf_counter() - start, 4)
+
+def render_pdf_pages(pdf_bytes, first_page=1, last_page=1, dpi=None, grayscale=None, timings=None):
+    import pdf2image
+
+    # Only the requested page range is rendered by poppler, not the whole document
+    start = time.perf_counter()
+    images = pdf2image.convert_from_bytes(
+        pdf_bytes,
+        dpi=dpi or RASTER_DPI,
+        first_page=first_page,
+        last_page=last_page,
+        grayscale=(RASTER_GRAYSCALE or RASTER_BINARIZE) if grayscale is None else grayscale
+    )
+    add_timing(timings, "rasterize", start)
+    return images
+
+def encode_page_images(images, timings=None):
+    from page_images import prepare_pages
+
+    start = time.perf_counter()
+    prepared = prepare_pages(
+        images,
+        grayscale=RASTER_GRAYSCALE,
+        binary=RASTER_BINARIZE,
+        crop=RASTER_CROP,
+        adaptive=RASTER_ADAPTIVE,
+        tiled=RASTER_TILE_PAGES,
+        quality=RASTER_JPEG_QUALITY or None
+    )
+    for image in images:
+        image.close()
+    file_parts = [
+        {"mime_type": mime_type, "data": base64.b64encode(data).decode()}
+        for mime_type, data, _ in prepared
+    ]
+    add_timing(timings, "encode", start)
+    return file_parts
+
+def rasterize_pdf(pdf_bytes, first_page=1, last_page=1, dpi=None, grayscale=None, timings=None):
+    return encode_page_images(render_pdf_pages(pdf_bytes, first_page, last_page, dpi, grayscale, timings), timings)
+
+def image_bytes(file_parts):
+    # Decoded size of the page images, which is what is uploaded over gRPC
+    return sum(len(part["data"]) * 3 // 4 for part in file_parts if part["mime_type"].startswith("image/"))
+
+def extract_pdf_text(pdf_bytes):
+    # pdftotext ships with poppler alongside pdftoppm, which pdf2image already requires
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as pdf_file:
+        pdf_file.write(pdf_bytes)
+        pdf_file.flush()
+        result = subprocess.run(
+            ["pdftotext", "-layout", "-enc", "UTF-8", pdf_file.name, "-"],
+            capture_output=True,
+            check=True
+        )
+    pages = result.stdout.decode("utf-8", "replace").split("\f")
+    # pdftotext terminates every page with a form feed, leaving an empty trailing chunk
+    if pages and not pages[-1].strip():
+        pages.pop()
+    return pages
+
+def extract_pdf(pdf_bytes):
+    timings = {}
+    start = time.perf_counter()
+    try:
+        pages = extract_pdf_text(pdf_bytes)
+    except (OSError, subprocess.CalledProcessError):
+        pages = []
+    add_timing(timings, "pdftotext", start)
+
+    text_pages = []
+    image_pages = []
+    for number, text in enumerate(pages, 1):
+        if len(text.strip()) >= MIN_PAGE_TEXT_CHARS:
+            text_pages.append(f"--- Page {number} ---\n{text.strip()}")
+        else:
+            image_pages.append(number)
+
+    if not text_pages:
+        # No usable text layer anywhere: send the first MAX_IMAGE_PAGES pages as images
+        last_page = min(MAX_IMAGE_PAGES, len(pages)) or 1
+        file_parts = rasterize_pdf(pdf_bytes, last_page=last_page, timings=timings)
+        return file_parts, {"path": "image", "pages": len(pages), "image_pages": list(range(1, last_page + 1)),
+                            "image_bytes": image_bytes(file_parts), "timings": timings}
+
+    file_parts = [{"mime_type": "text/plain", "data": "\n\n".join(text_pages)}]
+    image_pages = image_pages[:MAX_IMAGE_PAGES]
+    if image_pages:
+        # Pages are rendered one at a time but prepared together, so they can share a tile
+        images = []
+        for number in image_pages:
+            images.extend(render_pdf_pages(pdf_bytes, first_page=number, last_page=number, timings=timings))
+        file_parts.extend(encode_page_images(images, timings))
+    path = "mixed" if image_pages else "text"
+    return file_parts, {"path": path, "pages": len(pages), "image_pages": image_pages,
+                        "image_bytes": image_bytes(file_parts), "timings": timings}
+
+def extract_document(file_bytes, mime_type):
+    if mime_type == "application/pdf":
+        return extract_pdf(file_bytes)
+    elif mime_type == DOCX_MIME_TYPE:
+        from docx import Document
+
+        timings = {}
+        start = time.perf_counter()
+        doc = Document(io.BytesIO(file_bytes))
+        doc_text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+        add_timing(timings, "docx", start)
+        return [{"mime_type": "text/plain", "data": doc_text}], {"path": "docx", "pages": None, "image_pages": [], "timings": timings}
+    elif mime_type == "text/plain":
+        text_content = file_bytes.decode("utf-8")
+        return [{"mime_type": "text/plain", "data": text_content}], {"path": "text", "pages": None, "image_pages": []}
+    else:
+        raise ValueError("Unsupported file format. Please upload a PDF, DOCX, or TXT file.")
+
+def extract_safely(file_bytes, mime_type):
+    # Errors come back as text so that extraction pool workers, whose log handlers never
+    # reach the page, report them through the parent process
+    try:
+        start = time.perf_counter()
+        file_parts, info = extract_document(file_bytes, mime_type)
+        info["extract_seconds"] = round(time.perf_counter() - start, 3)
+        return (file_parts, info), None
+    except ValueError as e:
+        return (None, None), str(e)
+    except Exception as e:
+        return (None, None), f"Error processing file: {str(e)}"
+
+def document_key(uploaded_file):
+    # Extraction settings are part of the key so changing them never serves stale page images
+    return make_cache_key(
+        uploaded_file.getvalue(), uploaded_file.type,
+        str(RASTER_DPI), str(RASTER_GRAYSCALE), str(MIN_PAGE_TEXT_CHARS), str(MAX_IMAGE_PAGES),
+        str(RASTER_CROP), str(RASTER_ADAPTIVE), str(RASTER_JPEG_QUALITY), str(RASTER_BINARIZE), str(RASTER_TILE_PAGES)
+    )
+
+def store_document(key, document, error, size):
+    metrics = get_metrics()
+    metrics.observe("document_bytes", size)
+    if error:
+        metrics.increment("extraction_errors")
+        logger.error(error)
+        return
+    info = document[1]
+    metrics.observe("extract_seconds", info["extract_seconds"])
+    if info.get("image_bytes"):
+        metrics.observe("image_payload_bytes", info["image_bytes"])
+    for stage, seconds in info.get("timings", {}).items():
+        metrics.observe(f"extract_{stage}_seconds", seconds)
+    if document[0]:
+        get_document_store().put(key, *document)
+
+def load_document(uploaded_file):
+    key = document_key(uploaded_file)
+    document = get_document_store().get(key)
+    if document is None:
+        document, error = extract_safely(uploaded_file.getvalue(), uploaded_file.type)
+        store_document(key, document, error, len(uploaded_file.getvalue()))
+    return document
+
+@shared_resource
+def get_extraction_pool():
+    # Spawned workers avoid forking a process that already runs threads (Streamlit, the Gemini client)
+    pool = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    # Worker processes are stopped with the app instead of lingering until they notice the parent is gone
+    atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+    return pool
+
+def iter_extracted(files):
+    """Yield (index, (parts, info)) for each file as soon as its extraction finishes.
+
+    PDF rasterization, JPEG/base64 encoding and DOCX parsing are CPU-bound, so
+    they run in a process pool. At most two files per worker are in flight;
+    the rest are only handed over as the consumer keeps up.
+    """
+    if EXTRACTION_WORKERS <= 1:
+        for i, uploaded_file in enumerate(files):
+            yield i, load_document(uploaded_file)
+        return
+    pool = get_extraction_pool()
+    store = get_document_store()
+    queued = iter(enumerate(files))
+    pending = {}
+    while True:
+        for i, uploaded_file in queued:
+            # Files extracted before are served from the document store without touching the pool
+            key = document_key(uploaded_file)
+            document = store.get(key)
+            if document is not None:
+                yield i, document
+                continue
+            pending[pool.submit(extract_safely, uploaded_file.getvalue(), uploaded_file.type)] = (
+                i, key, len(uploaded_file.getvalue())
+            )
+            if len(pending) >= 2 * EXTRACTION_WORKERS:
+                break
+        if not pending:
+            return
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            i, key, size = pending.pop(future)
+            try:
+                document, error = future.result()
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool) and pool is get_extraction_pool():
+                    # A crashed worker breaks the whole pool; later files go to a fresh one
+                    get_extraction_pool.cache_clear()
+                    pool = get_extraction_pool()
+                document, error = (None, None), f"Error processing file: {str(e)}"
+            store_document(key, document, error, size)
+            yield i, document
+
+def input_file_setup(uploaded_file):
+    file_parts, _ = load_document(uploaded_file)
+    return file_parts
+
+def parse_legacy_match(response):
+    # Free-text answers: only a percentage next to "match" counts; any other figure in the text
+    # ("grew revenue 30%") says nothing about the candidate's fit
+    match = (re.search(r'match[^\d]{0,40}(\d{1,3})(?:\.\d+)?\s*%', response, re.IGNORECASE)
+             or re.search(r'(\d{1,3})(?:\.\d+)?\s*%\s*match', response, re.IGNORECASE))
+    if not match or int(match.group(1)) > 100:
+        return None
+    return {"score": int(match.group(1)), "missing_keywords": [], "summary": response.strip()}
+
+def load_json_response(response):
+    text = response.strip()
+    # Models occasionally wrap JSON in a markdown code fence despite the response MIME type
+    fenced = re.match(r'^```(?:json)?\s*(.*?)\s*```$', text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    return json.loads(text)
+
+def normalize_match(data):
+    try:
+        score = data["score"]
+        if isinstance(score, str):
+            score = float(score.strip().rstrip("%"))
+        score = int(round(float(score)))
+        if not 0 <= score <= 100:
+            return None
+        missing_keywords = data.get("missing_keywords") or []
+        if isinstance(missing_keywords, str):
+            missing_keywords = [keyword.strip() for keyword in missing_keywords.split(",") if keyword.strip()]
+        return {
+            "score": score,
+            "missing_keywords": [str(keyword) for keyword in missing_keywords],
+            "summary": str(data.get("summary") or ""),
+        }
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+def parse_json_match(response):
+    try:
+        return normalize_match(load_json_response(response))
+    except (ValueError, AttributeError):
+        return None
+
+def parse_match_response(response):
+    if not response:
+        return None
+    with get_metrics().timer("parse_match"):
+        return parse_json_match(response) or parse_legacy_match(response)
+
+def extract_percentage_match(response):
+    parsed = parse_match_response(response)
+    return parsed["score"] if parsed else None
+
+def format_match_response(response):
+    parsed = parse_json_match(response) if response else None
+    if not parsed:
+        # Legacy free-text answer: show it as the model wrote it
+        return response
+    missing = ", ".join(parsed["missing_keywords"]) or "None"
+    return (
+        f"**Percentage Match:** {parsed['score']}%\n\n"
+        f"**Missing Keywords:** {missing}\n\n"
+        f"**Final Thoughts:** {parsed['summary']}"
+    )
+
+def document_text(file_parts):
+    if not file_parts:
+        return ""
+    return "\n".join(part["data"] for part in file_parts if part["mime_type"] == "text/plain")
+
+def response_cache_key(input_text, uploaded_file, prompt_key):
+    return make_cache_key(
+        uploaded_file.getvalue(), input_text, prompt_key, prompts[prompt_key], answering_model(input_text),
+        json.dumps(GENERATION_CONFIGS.get(prompt_key), sort_keys=True), str(REQUEST_TOKEN_BUDGET)
+    )
+
+def chunk_budget(input_text):
+    # What is left of the request budget for the document once the job description and prompt are sent
+    return max(REQUEST_TOKEN_BUDGET - estimate_tokens([input_text, prompts["chunk_notes"]]), REQUEST_TOKEN_BUDGET // 4)
+
+def take_chunk_notes(input_text, chunks, budget, initializer=None):
+    """Reduce a chunked document to notes that fit `budget` tokens, or return None if a chunk call fails.
+
+    Chunks are evaluated concurrently, so each round costs about one model
+    call of latency however long the document is; notes that are still too
+    long are chunked again, for at most MAX_CHUNK_ROUNDS rounds. Notes still
+    over budget after that are returned anyway, with a warning, as they are
+    far shorter than the document they replace.
+    """
+    metrics = get_metrics()
+    parts = len(chunks)
+    for _ in range(MAX_CHUNK_ROUNDS):
+        metrics.observe("chunks_per_request", len(chunks))
+        with metrics.timer("chunk_round"):
+            notes = map_concurrently(
+                get_gemini_response,
+                [(input_text, chunk, prompts["chunk_notes"], "chunk_notes") for chunk in chunks],
+                MAX_CONCURRENT_REQUESTS,
+                initializer=initializer
+            )
+        if not all(notes):
+            return None
+        text = "\n\n".join(f"Part {i} of {len(notes)}:\n{note.strip()}" for i, note in enumerate(notes, 1))
+        if estimate_tokens([text]) <= budget:
+            break
+        chunks = chunk_document([{"mime_type": "text/plain", "data": text}], budget, IMAGE_TOKENS)
+    else:
+        metrics.increment("chunk_notes_over_budget")
+        logger.warning(f"Chunk notes are still {estimate_tokens([text])} tokens after {MAX_CHUNK_ROUNDS} rounds, "
+                       f"over the budget of {budget}")
+    return CHUNK_NOTES_HEADER.format(parts=parts) + "\n\n" + text
+
+def fit_to_budget(input_text, uploaded_file, file_content, initializer=None):
+    """The document parts to send with a prompt: the document itself when it fits REQUEST_TOKEN_BUDGET,
+    otherwise its chunk notes, which are cached and shared by every prompt. None if they could not be taken."""
+    budget = chunk_budget(input_text)
+    if not REQUEST_TOKEN_BUDGET or estimate_tokens(file_content) <= budget:
+        return file_content
+    chunks = chunk_document(file_content, budget, IMAGE_TOKENS)
+    if len(chunks) < 2:
+        # A single page image larger than the budget cannot be split any further
+        return file_content
+    cache = get_result_cache()
+    key = response_cache_key(input_text, uploaded_file, "chunk_notes")
+    notes = cache.get(key)
+    if notes is None:
+        get_metrics().increment("chunked_documents")
+        notes = take_chunk_notes(input_text, chunks, budget, initializer)
+        if notes is None:
+            return None
+        cache.set(key, notes)
+    return [{"mime_type": "text/plain", "data": notes}]
+
+def usable_response(prompt_key, response):
+    # Structured answers must parse before they are used or cached; free-text answers only need to exist
+    if not response:
+        return False
+    if prompt_key == "match":
+        return parse_match_response(response) is not None
+    if prompt_key == "all_reports":
+        return parse_all_reports(response) is not None
+    return True
+
+def cached_gemini_response(input_text, uploaded_file, prompt_key, document=None, initializer=None):
+    cache = get_result_cache()
+    key = response_cache_key(input_text, uploaded_file, prompt_key)
+    cached = cache.get(key)
+    if cached is not None:
+        try:
+            entry = json.loads(cached)
+            if usable_response(prompt_key, entry["response"]):
+                return entry["response"], entry["document"]
+        except (ValueError, KeyError, TypeError):
+            pass
+    file_content, document_info = document or load_document(uploaded_file)
+    if not file_content:
+        return None, None
+    file_content = fit_to_budget(input_text, uploaded_file, file_content, initializer)
+    if not file_content:
+        return None, document_info
+    response = None
+    # An answer that does not parse is asked for once more, then given up on without being cached,
+    # so the candidate counts as failed and is asked again on the next run
+    for _ in range(2):
+        response = get_gemini_response(input_text, file_content, prompts[prompt_key], prompt_key)
+        if response is None or usable_response(prompt_key, response):
+            break
+        get_metrics().increment("unusable_responses")
+        logger.info(f"Unusable {prompt_key} answer for {uploaded_file.name}")
+        response = None
+    if response:
+        cache.set(key, json.dumps({"response": response, "document": document_info}))
+    return response, document_info
+
+def parse_all_reports(response):
+    try:
+        data = load_json_response(response)
+        match = normalize_match(data["match"])
+        analysis, keyword_analysis = data["analysis"], data["keyword_analysis"]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+    if not match or not isinstance(analysis, str) or not isinstance(keyword_analysis, str):
+        return None
+    # The match report is kept as JSON so it goes through the same parser as a standalone match answer
+    return {"analysis": analysis, "match": json.dumps(match), "keyword_analysis": keyword_analysis}
+
+def generate_all_reports(input_text, uploaded_file, max_concurrency=len(REPORT_TITLES), initializer=None):
+    response, document_info = cached_gemini_response(input_text, uploaded_file, "all_reports", initializer=initializer)
+    reports = parse_all_reports(response) if response else None
+    if reports:
+        return reports, document_info
+
+    # The combined answer was unusable: fan out the individual prompts concurrently,
+    # sharing one extraction of the document between them
+    document = load_document(uploaded_file)
+    if not document[0]:
+        return None, None
+    results = map_concurrently(
+        cached_gemini_response,
+        [(input_text, uploaded_file, key, document, initializer) for key in REPORT_TITLES],
+        max_concurrency,
+        initializer=initializer
+    )
+    reports = {key: result[0] for key, result in zip(REPORT_TITLES, results) if result[0]}
+    if len(reports) == len(REPORT_TITLES):
+        # Stored as the combined answer, so later requests for it are served from the cache
+        # instead of asking for the combined answer again
+        combined = dict(reports, match=parse_match_response(reports["match"]))
+        get_result_cache().set(
+            response_cache_key(input_text, uploaded_file, "all_reports"),
+            json.dumps({"response": json.dumps(combined), "document": document[1]})
+        )
+    return reports or None, document[1]
+
+def stream_cached_gemini_response(input_text, uploaded_file, prompt_key, initializer=None):
+    cache = get_result_cache()
+    key = response_cache_key(input_text, uploaded_file, prompt_key)
+    cached = cache.get(key)
+    if cached is not None:
+        try:
+            yield json.loads(cached)["response"]
+            return
+        except (ValueError, KeyError, TypeError):
+            pass
+    file_content, document_info = load_document(uploaded_file)
+    if not file_content:
+        return
+    file_content = fit_to_budget(input_text, uploaded_file, file_content, initializer)
+    if not file_content:
+        return
+    chunks = []
+    # An error part-way through is raised after the text received so far, so the caller can tell
+    # a truncated answer from a complete one
+    for text in stream_gemini_response(input_text, file_content, prompts[prompt_key], prompt_key):
+        chunks.append(text)
+        yield text
+    # Only complete answers are cached
+    if chunks:
+        cache.set(key, json.dumps({"response": "".join(chunks), "document": document_info}))
+
+def score_resume(job_description, resume, document=None, initializer=None):
+    return cached_gemini_response(job_description, resume, "match", document, initializer)
+
+def map_concurrently(func, args_list, max_concurrency, on_done=None, initializer=None):
+    results = [None] * len(args_list)
+    if not args_list:
+        return results
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_concurrency, len(args_list))),
+        initializer=initializer
+    ) as executor:
+        futures = {executor.submit(func, *args): i for i, args in enumerate(args_list)}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            if on_done:
+                on_done(i, results[i])
+    return results
+
+def semantic_scores(job_description, texts):
+    """Deterministic 0-100 semantic match per text from local embeddings, or None when unavailable.
+
+    Each job requirement is matched against its closest resume section, so a
+    resume scores well when it covers many requirements, not just the overall topic.
+    """
+    try:
+        model = get_embedder()
+        if model is None:
+            return None
+        cache = get_embedding_cache()
+        requirement_vectors = np.vstack(embed_texts(model, SEMANTIC_MODEL, split_requirements(job_description), cache))
+        readable = [i for i, text in enumerate(texts) if text.strip()]
+        document_vectors = embed_texts(model, SEMANTIC_MODEL, [texts[i] for i in readable], cache)
+    except Exception as e:
+        logger.warning(f"Semantic scoring unavailable: {str(e)}")
+        return None
+    scores = [None] * len(texts)
+    for i, score in zip(readable, to_percentage(requirement_coverage(requirement_vectors, document_vectors))):
+        scores[i] = round(float(score), 1)
+    return scores
+
+def index_resumes(entries):
+    # Adds (document key, name, text) entries to the archive index; needs the embedding model
+    model = get_embedder()
+    if model is None:
+        return
+    index = get_vector_index()
+    missing = set(index.missing([key for key, _, _ in entries]))
+    entries = [entry for entry in entries if entry[0] in missing]
+    if entries:
+        vectors = embed_texts(model, SEMANTIC_MODEL, [text for _, _, text in entries], get_embedding_cache())
+        index.add([(key, name, matrix) for (key, name, _), matrix in zip(entries, vectors)])
+
+def search_archive(job_description, top_n):
+    """Find the top_n previously processed resumes that best cover a job description.
+
+    Returns ({name: ArchivedResume}, {name: (parts, info)}), ready to pass to
+    rank_resumes as resumes and preloaded documents, so the shortlist goes
+    straight to the match prompt without re-extraction.
+    """
+    try:
+        model = get_embedder()
+        if model is None:
+            logger.error("Searching the archive needs the optional sentence-transformers package")
+            return {}, {}
+        requirement_vectors = np.vstack(
+            embed_texts(model, SEMANTIC_MODEL, split_requirements(job_description), get_embedding_cache())
+        )
+        hits = get_vector_index().search(requirement_vectors, top_n)
+    except Exception as e:
+        logger.error(f"Error searching the archive: {str(e)}")
+        return {}, {}
+    store = get_document_store()
+    resumes, documents = {}, {}
+    evicted = []
+    for key, name, _ in hits:
+        document = store.get(key)
+        if document is None:
+            evicted.append(key)
+            continue
+        # Different files can share a name; the archive keeps them apart
+        label, copy = name, 2
+        while label in resumes:
+            label, copy = f"{name} ({copy})", copy + 1
+        resumes[label] = ArchivedResume(label, key)
+        documents[label] = document
+    if evicted:
+        # Only left behind when the document store was cleared or shrunk by another process
+        get_vector_index().remove(evicted)
+        logger.warning(f"{len(evicted)} archived resume(s) are no longer in the document store and were removed")
+    return resumes, documents
+
+def format_requirements(data):
+    try:
+        title = str(data.get("title") or "").strip()
+        must_have, nice_to_have = (
+            [str(item).strip() for item in data.get(key) or [] if str(item).strip()]
+            for key in ("must_have", "nice_to_have")
+        )
+    except (AttributeError, TypeError):
+        return None
+    if not must_have and not nice_to_have:
+        return None
+    lines = [f"Job title: {title}"] if title else []
+    if must_have:
+        lines += ["Required:", *(f"- {item}" for item in must_have)]
+    if nice_to_have:
+        lines += ["Preferred:", *(f"- {item}" for item in nice_to_have)]
+    return "\n".join(lines)
+
+def condense_job_description(file_parts):
+    """Requirement list for a job description given as document parts, or None if the model call failed.
+
+    Made by one model call and cached by the job description's content, so
+    every batch ranked against the same job description reuses it. Page
+    images of a scanned job description are read by the model as well.
+    """
+    cache = get_result_cache()
+    key = make_cache_key(
+        *(part["data"] for part in file_parts), prompts["job_requirements"], MODEL_NAME,
+        json.dumps(GENERATION_CONFIGS["job_requirements"], sort_keys=True)
+    )
+    condensed = cache.get(key)
+    if condensed is not None:
+        return condensed
+    with get_metrics().timer("condense_job_description"):
+        response = get_gemini_response("Job description:", file_parts, prompts["job_requirements"], "job_requirements")
+    try:
+        condensed = format_requirements(load_json_response(response)) if response else None
+    except ValueError:
+        condensed = None
+    if condensed:
+        cache.set(key, condensed)
+    return condensed
+
+def job_description_for_model(job_description):
+    # The full text is kept when condensing is off, fails, or would not make it any shorter
+    if not CONDENSE_JOB_DESCRIPTION:
+        return job_description
+    condensed = condense_job_description([{"mime_type": "text/plain", "data": job_description}])
+    if not condensed or len(condensed) >= len(job_description):
+        return job_description
+    return condensed
+
+def job_description_text(uploaded_file):
+    """Text of an uploaded job description, or an empty string if none could be read.
+
+    Scanned files without a text layer are read by the model, and their
+    requirement list stands in for the text.
+    """
+    return job_description_from_parts(input_file_setup(uploaded_file))
+
+def job_description_from_parts(file_parts):
+    # The model call for scanned files is only cached when it succeeds, so a failure is retried next time
+    text = document_text(file_parts)
+    if text.strip() or not file_parts:
+        return text
+    return condense_job_description(file_parts) or ""
+
+def requisition_id(job_description):
+    # Cosmetic edits to the job description (case, spacing) keep the same requisition
+    return make_cache_key(" ".join(job_description.lower().split()), MODEL_NAME, prompts["match"])
+
+def new_record(name):
+    return {
+        "name": name,
+        "status": "pending",
+        "local_score": None,
+        "semantic_score": None,
+        "match_percentage": None,
+        "response": None,
+        "missing_keywords": [],
+        "document": None,
+        "reused": False,
+    }
+
+def rank_resumes(job_description, resumes, top_k=PRERANK_TOP_K, max_concurrency=MAX_CONCURRENT_REQUESTS,
+                 store=None, on_progress=None, on_result=None, initializer=None, use_model=True, preloaded=None,
+                 skip_model=()):
+    metrics = get_metrics()
+    batch_start = time.perf_counter()
+    names = list(resumes)
+    requisition = requisition_id(job_description) if store else None
+    known = store.load(requisition) if store else {}
+    hashes = [make_cache_key(resumes[name].getvalue()) for name in names]
+    records = [None] * len(names)
+    texts = [None] * len(names)
+    documents = [None] * len(names)
+
+    # Candidates already seen for this requisition keep their stored text and result
+    for i, (name, resume_hash) in enumerate(zip(names, hashes)):
+        if resume_hash in known:
+            records[i] = dict(known[resume_hash]["record"], name=name, reused=True)
+            texts[i] = known[resume_hash]["text"]
+    new = [i for i, record in enumerate(records) if record is None]
+    model_input = []
+
+    def model_job_description():
+        # Condensed on first use, so a batch that sends nothing to the model never pays for it
+        if not model_input:
+            model_input.append(job_description_for_model(job_description))
+        return model_input[0]
+
+    total_steps = len(new) + min(len(names), top_k or len(names))
+    completed = [0]
+    ranked_locally = [False]
+    # Names in skip_model (finished by an earlier run) are still ranked locally, so the shortlist is the same,
+    # but never sent to the model again
+    attempted = {i for i, name in enumerate(names) if name in skip_model}
+
+    def advance():
+        completed[0] += 1
+        if on_progress:
+            on_progress(min(completed[0], total_steps), max(total_steps, 1))
+
+    def finish(i):
+        if store:
+            store.save(requisition, hashes[i], {k: v for k, v in records[i].items() if k != "reused"}, texts[i])
+        if on_result:
+            on_result(records[i])
+
+    def extracted(i, document):
+        documents[i] = document
+        if records[i] is None:
+            records[i] = new_record(names[i])
+            texts[i] = document_text(document[0])
+        records[i]["document"] = document[1]
+        if not document[0]:
+            records[i]["status"] = "unreadable"
+
+    def collect(i, result):
+        record = records[i]
+        response, info = result
+        record["document"] = info or documents[i][1]
+        parsed = parse_match_response(response)
+        if parsed:
+            record["status"] = "scored"
+            record["response"] = format_match_response(response)
+            record["match_percentage"] = parsed["score"]
+            record["missing_keywords"] = parsed["missing_keywords"]
+        else:
+            # Without a score the candidate would drop out of the ranking, so it is retried on the next run
+            record["status"] = "failed"
+        advance()
+        # Results that arrive before the local ranking are finished with it, once local_score is known
+        if ranked_locally[0]:
+            finish(i)
+
+    def extract_and_score(indices, score):
+        # Documents are extracted in the process pool. With `score` set, each readable one goes to the
+        # model as soon as it is ready; the pending set is the bounded queue between the two stages and
+        # no further files are handed to the pool while it is full.
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency), initializer=initializer) as executor:
+            pending = {}
+
+            def drain(limit):
+                while len(pending) > limit:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(pending.pop(future), future.result())
+
+            for j, document in iter_extracted([resumes[names[i]] for i in indices]):
+                i = indices[j]
+                extracted(i, document)
+                advance()
+                if score and document[0] and i not in attempted:
+                    drain(2 * max(1, max_concurrency) - 1)
+                    attempted.add(i)
+                    pending[executor.submit(score_resume, model_job_description(), resumes[names[i]], document, initializer)] = i
+            drain(0)
+
+    # Documents supplied by the caller (archive search results) are never extracted again
+    preloaded = preloaded or {}
+    for i, name in enumerate(names):
+        if name in preloaded:
+            if records[i] is None:
+                extracted(i, preloaded[name])
+                advance()
+            else:
+                documents[i] = preloaded[name]
+
+    # When the shortlist cannot exclude anyone, scoring overlaps extraction instead of waiting for it
+    extract_and_score([i for i in new if names[i] not in preloaded],
+                      score=use_model and (not top_k or len(names) <= top_k))
+
+    # Rank the whole pool locally with BM25 and only send the top_k candidates to the model.
+    # Documents without a text layer cannot be ranked locally, so they always go through.
+    with metrics.timer("bm25"):
+        scores = bm25_scores(job_description, texts)
+    top_score = scores.max() if len(scores) and scores.max() > 0 else 1.0
+    for record, score in zip(records, scores):
+        record["local_score"] = round(float(score) / top_score * 100, 1)
+    with metrics.timer("semantic"):
+        semantic = semantic_scores(job_description, texts)
+    for record, score in zip(records, semantic or [None] * len(records)):
+        record["semantic_score"] = score
+    try:
+        with metrics.timer("archive_index"):
+            index_resumes([(document_key(resumes[names[i]]), names[i], texts[i])
+                           for i in range(len(names)) if names[i] not in preloaded and texts[i].strip()])
+    except Exception as e:
+        logger.warning(f"Could not add resumes to the archive index: {str(e)}")
+    ranked_locally[0] = True
+    ranked = [i for i in shortlist(scores, 0) if texts[i].strip()]
+    selected = set(ranked[:top_k] if top_k else ranked)
+    selected.update(i for i, record in enumerate(records) if record["status"] != "unreadable" and not texts[i].strip())
+    if not use_model:
+        # Local scores only: nothing is sent to the model
+        selected = set()
+    # Candidates scored in an earlier run are never sent again, even if they have since left the shortlist
+    to_score = sorted(i for i in selected if records[i]["status"] != "scored" and i not in attempted)
+
+    for i, record in enumerate(records):
+        if i in to_score:
+            continue
+        if i not in selected and record["status"] not in ("scored", "unreadable"):
+            record["status"] = "not_shortlisted"
+        finish(i)
+
+    # Stored candidates that newly made the shortlist still need their document extracted
+    to_extract = [i for i in to_score if documents[i] is None]
+    total_steps = completed[0] + len(to_extract) + len(to_score)
+    extract_and_score(to_extract, score=True)
+    for i in to_extract:
+        if not documents[i][0]:
+            finish(i)
+
+    remaining = [i for i in to_score if i not in attempted and documents[i][0]]
+    map_concurrently(
+        score_resume,
+        [(model_job_description(), resumes[names[i]], documents[i], initializer) for i in remaining],
+        max_concurrency,
+        lambda j, result: collect(remaining[j], result),
+        initializer
+    )
+
+    failed = [record["name"] for record in records if record["status"] == "failed"]
+    if failed:
+        logger.warning(f"Could not score {len(failed)} resume(s) after retries: {', '.join(failed)}")
+
+    metrics.observe("rank_batch_seconds", time.perf_counter() - batch_start)
+    metrics.increment("resumes_ranked", len(records))
+    export_metrics()
+
+    # Records stay in input order so the ranking is stable regardless of completion order
+    return records
@@ -0,0 +1,112 @@
+import re
+import time
+
+import numpy as np
+
+from result_cache import make_cache_key
+from sqlite_store import SQLiteStore
+
+BULLET_PATTERN = re.compile(r"^\s*(?:[-*•▪●◦]|\d+[.)])\s*")
+SENTENCE_SPLIT = re.compile(r"(?<=[.;!?])\s+")
+
+
+def split_requirements(text, max_requirements=40, min_words=3):
+    # Job descriptions are mostly bullet lists; longer prose lines are split into sentences
+    requirements = []
+    for line in text.splitlines():
+        line = BULLET_PATTERN.sub("", line).strip()
+        for sentence in SENTENCE_SPLIT.split(line):
+            if len(sentence.split()) >= min_words:
+                requirements.append(sentence)
+    return requirements[:max_requirements] or [text.strip()]
+
+
+def split_sections(text, words_per_chunk=80, overlap=20):
+    words = text.split()
+    if not words:
+        return []
+    step = max(1, words_per_chunk - overlap)
+    return [" ".join(words[start:start + words_per_chunk])
+            for start in range(0, max(1, len(words) - overlap), step)]
+
+
+class EmbeddingCache(SQLiteStore):
+    """Persistent SQLite cache of per-document chunk embeddings with LRU eviction under a size cap."""
+
+    TABLE = "embeddings"
+    COLUMNS = "key TEXT PRIMARY KEY, rows INTEGER NOT NULL, vectors BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL"
+
+    def __init__(self, path, max_bytes=200 * 1024 * 1024):
+        super().__init__(path, max_bytes)
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock, self._connect() as conn:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, rows, vectors FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, count, vectors in rows:
+                    found[key] = np.frombuffer(vectors, dtype=np.float16).reshape(count, -1)
+            if found:
+                conn.executemany("UPDATE embeddings SET accessed = ? WHERE key = ?",
+                                 [(time.time(), key) for key in found])
+        return found
+
+    def put_many(self, items):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, rows, vectors, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                [(key, len(vectors), vectors.tobytes(), vectors.size * 2, now)
+                 for key, vectors in items.items()]
+            )
+            self._evict(conn)
+
+
+def embed_texts(model, model_name, texts, cache=None, batch_size=64):
+    """Return one normalized (chunks x dim) float32 matrix per text, embedding only uncached texts."""
+    keys = [make_cache_key(model_name, text) for text in texts]
+    found = cache.get_many(list(set(keys))) if cache else {}
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in found and key not in missing:
+            missing[key] = split_sections(text) or [""]
+    if missing:
+        # One encode call for every chunk of every new document keeps batches full
+        chunks = [chunk for sections in missing.values() for chunk in sections]
+        vectors = model.encode(chunks, batch_size=batch_size, normalize_embeddings=True,
+                               convert_to_numpy=True, show_progress_bar=False)
+        offset = 0
+        computed = {}
+        for key, sections in missing.items():
+            # Stored as float16; fresh vectors are rounded the same way so cached and new scores agree
+            computed[key] = vectors[offset:offset + len(sections)].astype(np.float16)
+            offset += len(sections)
+        if cache:
+            cache.put_many(computed)
+        found.update(computed)
+    return [found[key].astype(np.float32) for key in keys]
+
+
+def requirement_coverage(requirement_vectors, document_vectors):
+    """Mean, over requirements, of the best cosine similarity with any chunk of each document."""
+    if not document_vectors:
+        return np.zeros(0)
+    counts = np.array([len(vectors) for vectors in document_vectors])
+    return flat_coverage(requirement_vectors, np.vstack(document_vectors), np.concatenate(([0], np.cumsum(counts)[:-1])))
+
+
+def flat_coverage(requirement_vectors, chunks, offsets):
+    # All documents are scored with a single matrix product; each document's rows start at its
+    # offset, so np.maximum.reduceat gives the best-matching chunk per requirement and document
+    similarities = requirement_vectors @ chunks.T
+    best = np.maximum.reduceat(similarities, offsets, axis=1)
+    return best.mean(axis=0)
+
+
+def to_percentage(coverage, floor=0.15, ceiling=0.75):
+    # Sentence-embedding cosines for related text rarely leave this band, so stretch it to 0-100
+    return np.clip((coverage - floor) / (ceiling - floor), 0.0, 1.0) * 100
@@ -0,0 +1,61 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class SQLiteStore:
+    """Base for the on-disk stores: one SQLite table, guarded by a per-instance lock.
+
+    Subclasses set TABLE and COLUMNS. With `max_bytes`, the table also needs
+    `size` and `accessed` columns, and `_evict` drops least recently used rows
+    until the table fits under the cap again.
+    """
+
+    TABLE = None
+    COLUMNS = None
+
+    def __init__(self, path, max_bytes=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.TABLE} ({self.COLUMNS})")
+            if max_bytes is not None:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {self.TABLE}_accessed ON {self.TABLE} (accessed)")
+
+    @contextmanager
+    def _connect(self):
+        # sqlite3's own context manager only commits or rolls back; the connection is closed here too
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        """Delete least recently used rows until the table fits under max_bytes; returns their keys."""
+        if self.max_bytes is None:
+            return []
+        total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.TABLE}").fetchone()[0]
+        evicted = []
+        if total <= self.max_bytes:
+            return evicted
+        for key, size in conn.execute(f"SELECT key, size FROM {self.TABLE} ORDER BY accessed").fetchall():
+            evicted.append(key)
+            total -= size
+            if total <= self.max_bytes:
+                break
+        conn.executemany(f"DELETE FROM {self.TABLE} WHERE key = ?", [(key,) for key in evicted])
+        return evicted
+
+    def _size(self, conn):
+        return conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.TABLE}").fetchone()
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute(f"DELETE FROM {self.TABLE}")
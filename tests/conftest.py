@@ -0,0 +1,6 @@
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The app's modules live at the repository root and the Gemini stand-ins in benchmarks/
+sys.path[:0] = [REPO_DIR, os.path.join(REPO_DIR, "benchmarks")]
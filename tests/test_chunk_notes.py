@@ -0,0 +1,23 @@
+import logging
+import threading
+
+import scoring
+
+
+def test_chunk_workers_run_the_initializer(monkeypatch):
+    monkeypatch.setattr(scoring, "get_gemini_response", lambda *args: "chunk summary")
+    initialized = []
+    chunks = [[{"mime_type": "text/plain", "data": "chunk"}]] * 3
+    notes = scoring.take_chunk_notes("job", chunks, 1000, lambda: initialized.append(threading.current_thread()))
+    assert notes.count("chunk summary") == 3
+    assert initialized and threading.current_thread() not in initialized
+
+
+def test_notes_over_budget_are_reported(monkeypatch, caplog):
+    # Every note is as long as the budget, so merging never fits it
+    monkeypatch.setattr(scoring, "get_gemini_response", lambda *args: "x" * 400)
+    chunks = [[{"mime_type": "text/plain", "data": "chunk"}]] * 2
+    with caplog.at_level(logging.WARNING, logger=scoring.logger.name):
+        notes = scoring.take_chunk_notes("job", chunks, 100)
+    assert notes is not None
+    assert "over the budget" in caplog.text
@@ -0,0 +1,43 @@
+import pytest
+
+import cli
+
+
+def record(name, score, response="Good fit.\nStrong Python."):
+    return {"name": name, "status": "scored", "match_percentage": score, "local_score": 1.0,
+            "missing_keywords": [], "document": {"path": "text"}, "response": response}
+
+
+@pytest.mark.parametrize("file_name", ["results.csv", "results.jsonl"])
+def test_resume_after_a_partial_record(tmp_path, file_name):
+    path = str(tmp_path / file_name)
+    writer = cli.ResultWriter(path)
+    writer.write(record("a.txt", 80))
+    writer.write(record("b.txt", 70))
+    writer.close()
+    with open(path, "rb+") as f:
+        # Cut off inside b.txt's multi-line response
+        f.truncate(f.read().rindex(b"Strong"))
+
+    cli.drop_partial_record(path)
+    rows = cli.read_completed(path)
+    assert [row["name"] for row in rows] == ["a.txt"]
+    writer = cli.ResultWriter(path, {row["name"]: row["status"] for row in rows})
+    writer.write(record("b.txt", 70))
+    writer.close()
+    rows = cli.read_completed(path)
+    assert [(row["name"], float(row["match_percentage"])) for row in rows] == [("a.txt", 80), ("b.txt", 70)]
+    assert rows[1]["response"] == "Good fit.\nStrong Python."
+
+
+def test_rows_missing_required_fields_are_skipped(tmp_path):
+    path = tmp_path / "results.csv"
+    path.write_text(
+        ",".join(cli.CSV_FIELDS) + "\r\n"
+        "a.txt,scored,,1.0,,,text,answer\r\n"
+        "b.txt,scored,63r8.txt,1.0,,,text,answer\r\n"
+        ",unreadable,,,,,,\r\n"
+        "c.txt,unreadable,,,,,,\r\n",
+        encoding="utf-8", newline=""
+    )
+    assert [row["name"] for row in cli.read_completed(str(path))] == ["c.txt"]
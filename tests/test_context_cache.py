@@ -0,0 +1,55 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import scoring
+
+
+@pytest.fixture
+def slow_caching(monkeypatch):
+    # CachedContent.create blocks until the test releases it, recording the contents it was asked for
+    created, release = [], threading.Event()
+
+    def create(model, contents, ttl):
+        created.append(contents[0])
+        release.wait(5)
+        return SimpleNamespace(name=f"cachedContents/{contents[0][0]}")
+
+    genai = SimpleNamespace(caching=SimpleNamespace(CachedContent=SimpleNamespace(create=create)))
+    monkeypatch.setattr(scoring, "get_genai", lambda: genai)
+    monkeypatch.setattr(scoring, "CONTEXT_CACHE_MIN_TOKENS", 10)
+    monkeypatch.setattr(scoring, "CONTEXT_CACHES", {})
+    return created, release
+
+
+def test_one_cache_per_job_description_without_blocking_others(slow_caching):
+    created, release = slow_caching
+    first, second = "a" * 100, "b" * 100
+    results = []
+    threads = [threading.Thread(target=lambda text=text: results.append(scoring.get_context_cache(text)))
+               for text in (first, first, second)]
+    for thread in threads:
+        thread.start()
+    # Both job descriptions are being cached at once; the lock is not held while creating
+    for _ in range(500):
+        if len(created) == 2:
+            break
+        threading.Event().wait(0.01)
+    assert sorted(created) == [first, second]
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(created) == 2 and len({result.name for result in results}) == 2
+
+
+def test_cached_answers_are_keyed_by_the_answering_model(monkeypatch):
+    monkeypatch.setattr(scoring, "CONTEXT_CACHE_MIN_TOKENS", 10)
+    resume = scoring.LocalFile("resume.txt", b"resume", "text/plain")
+    short, long = "short", "x" * 100
+    assert scoring.answering_model(short) == scoring.MODEL_NAME
+    assert scoring.answering_model(long) == scoring.CONTEXT_CACHE_MODEL
+    monkeypatch.setattr(scoring, "CONTEXT_CACHE_MODEL", "models/other-001")
+    key = scoring.response_cache_key(long, resume, "match")
+    monkeypatch.setattr(scoring, "CONTEXT_CACHE_MODEL", "models/other-002")
+    assert scoring.response_cache_key(long, resume, "match") != key
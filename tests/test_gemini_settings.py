@@ -0,0 +1,19 @@
+import pytest
+
+import scoring
+
+
+def test_changed_settings_reconfigure_the_sdk(monkeypatch):
+    genai = pytest.importorskip("google.generativeai")
+    configured = []
+    monkeypatch.setattr(genai, "configure", lambda **settings: configured.append(settings["api_key"]))
+    monkeypatch.setattr(scoring, "GEMINI_SETTINGS", {})
+    scoring.get_genai.cache_clear()
+    scoring.configure_gemini("first")
+    scoring.get_genai()
+    scoring.configure_gemini("first")
+    scoring.get_genai()
+    scoring.configure_gemini("second")
+    scoring.get_genai()
+    assert configured == ["first", "second"]
+    scoring.get_genai.cache_clear()
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+import scoring
+
+
+@pytest.fixture
+def isolated(monkeypatch, tmp_path):
+    # Fresh on-disk caches per test, and a model whose answers the test supplies
+    monkeypatch.setattr(scoring, "RESULT_CACHE_PATH", str(tmp_path / "results.sqlite3"))
+    monkeypatch.setattr(scoring, "DOCUMENT_STORE_PATH", str(tmp_path / "documents.sqlite3"))
+    scoring.get_result_cache.cache_clear()
+    scoring.get_document_store.cache_clear()
+    answers = []
+    monkeypatch.setattr(scoring, "get_gemini_response", lambda *args: answers.pop(0) if answers else None)
+    yield answers
+    scoring.get_result_cache.cache_clear()
+    scoring.get_document_store.cache_clear()
+
+
+def test_json_match_is_parsed():
+    parsed = scoring.parse_match_response('```json\n{"score": "81%", "missing_keywords": "Go, Rust", "summary": "ok"}\n```')
+    assert parsed == {"score": 81, "missing_keywords": ["Go", "Rust"], "summary": "ok"}
+
+
+@pytest.mark.parametrize("response, score", [
+    ("Percentage match: 72% \nMissing keywords: Kubernetes", 72),
+    ("The candidate is a 64% match for the role.", 64),
+    ("Grew revenue 30% year over year. Match: 55%", 55),
+])
+def test_legacy_match_uses_the_percentage_next_to_match(response, score):
+    assert scoring.extract_percentage_match(response) == score
+
+
+@pytest.mark.parametrize("response", [
+    "Grew revenue 30% and cut costs 12%.",
+    '{"score": 140, "missing_keywords": [], "summary": ""}',
+    "Match: 250%",
+])
+def test_answers_without_a_match_score_are_rejected(response):
+    assert scoring.parse_match_response(response) is None
+
+
+def test_unparseable_match_is_retried_and_not_cached(isolated):
+    resume = scoring.LocalFile("resume.txt", b"Python developer")
+    isolated.extend(["I cannot tell.", "Still no score."])
+    response, info = scoring.cached_gemini_response("Python job", resume, "match")
+    assert response is None
+    assert info["path"] == "text"
+    assert isolated == []
+
+    answer = json.dumps({"score": 70, "missing_keywords": [], "summary": "Good"})
+    isolated.extend(["Grew revenue 30%", answer])
+    response, _ = scoring.cached_gemini_response("Python job", resume, "match")
+    assert response == answer
+    # Served from the cache from now on
+    assert scoring.cached_gemini_response("Python job", resume, "match")[0] == answer
+
+
+def test_fallback_reports_replace_an_unusable_combined_answer(isolated):
+    resume = scoring.LocalFile("resume.txt", b"Python developer")
+    match = json.dumps({"score": 70, "missing_keywords": ["Go"], "summary": "Good"})
+    isolated.extend(["not json", "still not json", "Analysis text", match, "Keyword text"])
+    reports, _ = scoring.generate_all_reports("Python job", resume, max_concurrency=1)
+    assert reports == {"analysis": "Analysis text", "match": match, "keyword_analysis": "Keyword text"}
+    assert isolated == []
+
+    # The next request is answered from the cache without any model call
+    assert scoring.generate_all_reports("Python job", resume)[0] == {
+        "analysis": "Analysis text",
+        "match": json.dumps(json.loads(match)),
+        "keyword_analysis": "Keyword text",
+    }
+
+
+def test_interrupted_stream_raises_and_is_not_cached(isolated, monkeypatch):
+    resume = scoring.LocalFile("resume.txt", b"Python developer")
+
+    def interrupted(*args):
+        yield "The candidate "
+        raise ConnectionError("stream reset")
+
+    monkeypatch.setattr(scoring, "stream_gemini_response", interrupted)
+    received = []
+    with pytest.raises(ConnectionError):
+        for text in scoring.stream_cached_gemini_response("Python job", resume, "analysis"):
+            received.append(text)
+    assert received == ["The candidate "]
+
+    monkeypatch.setattr(scoring, "stream_gemini_response", lambda *args: iter(["Complete ", "report"]))
+    assert "".join(scoring.stream_cached_gemini_response("Python job", resume, "analysis")) == "Complete report"
+
+
+def test_failed_job_description_reading_is_retried(isolated):
+    # A scanned job description: no text layer, only a page image
+    parts = [{"mime_type": "image/jpeg", "data": "aW1hZ2U="}]
+    isolated.extend([None, '{"title": "Engineer", "must_have": ["Python"], "nice_to_have": []}'])
+    assert scoring.job_description_from_parts(parts) == ""
+    assert scoring.job_description_from_parts(parts) == "Job title: Engineer\nRequired:\n- Python"
@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("numpy")
+from PIL import Image, ImageDraw
+
+import page_images
+
+
+def text_page(sidebar=False, rule=False, speckle=False):
+    # Lines of 20 px "text" every 50 px, drawn as runs of short dark strokes
+    page = Image.new("L", (1200, 1600), 255)
+    draw = ImageDraw.Draw(page)
+    for top in range(100, 1500, 50):
+        for left in range(350, 1100, 12):
+            draw.rectangle((left, top, left + 6, top + 19), fill=0)
+    if sidebar:
+        draw.rectangle((0, 0, 299, 1599), fill=40)
+    if rule:
+        draw.line((320, 0, 320, 1599), fill=0, width=2)
+    if speckle:
+        for y in range(0, 1600, 3):
+            page.putpixel(((y * 37) % 1200, y), 0)
+    return page
+
+
+def test_line_height_of_plain_page():
+    assert page_images.median_line_height(text_page()) == 20
+
+
+def test_sidebar_rule_and_speckle_do_not_merge_lines():
+    page = text_page(sidebar=True, rule=True, speckle=True)
+    assert page_images.median_line_height(page) == 20
+    assert page_images.legible_scale(page) == 1.0
+
+
+def test_blank_page_is_not_scaled():
+    assert page_images.median_line_height(Image.new("L", (100, 100), 255)) is None
+    assert page_images.legible_scale(Image.new("L", (100, 100), 0)) == 1.0
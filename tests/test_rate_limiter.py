@@ -0,0 +1,155 @@
+import pytest
+import requests
+
+import rate_limiter
+from rate_limiter import RequestScheduler, TokenBucket
+from stub_gemini_server import StubGeminiServer
+
+
+class FakeClock:
+    """Stands in for time.monotonic and time.sleep so waits take no real time."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class StatusError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limiter.time, "sleep", clock.sleep)
+    return clock
+
+
+def failing(errors, result="ok"):
+    # A call that raises each of `errors` in turn, then returns `result`
+    errors = list(errors)
+    calls = []
+
+    def call(timeout):
+        calls.append(timeout)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return call, calls
+
+
+def test_bucket_refills_at_rate(clock):
+    bucket = TokenBucket(rate=2.0, capacity=4)
+    assert all(bucket.acquire() for _ in range(4))
+    assert bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_bucket_never_exceeds_capacity(clock):
+    bucket = TokenBucket(rate=10.0, capacity=2)
+    clock.now += 60
+    assert bucket.acquire(2)
+    assert not bucket.acquire(1, deadline=clock.now)
+
+
+def test_bucket_gives_up_at_deadline(clock):
+    bucket = TokenBucket(rate=1.0, capacity=1)
+    assert bucket.acquire()
+    assert not bucket.acquire(1, deadline=clock.now + 0.5)
+    assert clock.sleeps == []
+
+
+def test_oversized_request_waits_for_a_full_bucket(clock):
+    bucket = TokenBucket(rate=1.0, capacity=3)
+    assert bucket.acquire(10)
+    assert bucket.acquire(3)
+    assert clock.sleeps == [pytest.approx(3.0)]
+
+
+def test_retries_with_exponential_backoff(clock, monkeypatch):
+    # Full jitter picks anywhere up to the cap; taking the cap makes the schedule exact
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda low, high: high)
+    scheduler = RequestScheduler(600, 10**6, max_retries=5, base_delay=1.0, max_delay=3.0)
+    call, calls = failing([StatusError(429), StatusError(503), StatusError(500)])
+    retried = []
+    assert scheduler.run(call, on_retry=retried.append) == "ok"
+    assert len(calls) == 4
+    assert [exc.code for exc in retried] == [429, 503, 500]
+    assert clock.sleeps == [1.0, 2.0, 3.0]
+    assert scheduler.stats["requests"] == 4
+    assert scheduler.stats["retries"] == 3
+    assert scheduler.stats["failures"] == 0
+
+
+def test_non_retryable_errors_are_raised_at_once(clock):
+    scheduler = RequestScheduler(600, 10**6)
+    call, calls = failing([StatusError(400)])
+    with pytest.raises(StatusError):
+        scheduler.run(call)
+    assert len(calls) == 1
+    assert scheduler.stats["failures"] == 1
+
+
+def test_gives_up_after_max_retries(clock):
+    scheduler = RequestScheduler(600, 10**6, max_retries=2, base_delay=0.01)
+    call, calls = failing([StatusError(503)] * 5)
+    with pytest.raises(StatusError):
+        scheduler.run(call)
+    assert len(calls) == 3
+    assert scheduler.stats["retries"] == 2
+
+
+def test_backoff_stops_at_the_deadline(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda low, high: high)
+    scheduler = RequestScheduler(600, 10**6, max_retries=10, base_delay=4.0, max_delay=64.0, deadline_seconds=10.0)
+    call, calls = failing([StatusError(429)] * 10)
+    with pytest.raises(StatusError):
+        scheduler.run(call)
+    # Waits of 4 and 8 seconds would end after the 10 second deadline, so only the first is taken
+    assert clock.sleeps == [4.0]
+    assert len(calls) == 2
+    # Every attempt is only given the time left before the deadline
+    assert calls == [pytest.approx(10.0), pytest.approx(6.0)]
+
+
+def test_quota_timeout_returns_the_request_token(clock):
+    # The token quota cannot cover this request before the deadline
+    scheduler = RequestScheduler(60, 600, deadline_seconds=1.0)
+    scheduler.token_bucket.acquire(scheduler.token_bucket.capacity)
+    with pytest.raises(TimeoutError):
+        scheduler.run(lambda timeout: "ok", estimated_tokens=100)
+    assert scheduler.request_bucket._tokens == scheduler.request_bucket.capacity
+    assert scheduler.stats["failures"] == 1
+    assert scheduler.stats["requests"] == 0
+
+
+def test_retries_rate_limits_from_a_local_endpoint():
+    server = StubGeminiServer(rate_limit_rate=1.0).start()
+    try:
+        def call(timeout):
+            response = requests.post(f"{server.endpoint}/v1beta/models/test:generateContent", json={}, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+
+        scheduler = RequestScheduler(600, 10**6, max_retries=2, base_delay=0.01, max_delay=0.02)
+        with pytest.raises(requests.HTTPError) as raised:
+            scheduler.run(call)
+        assert raised.value.response.status_code == 429
+        assert server.request_count == 3
+        assert scheduler.stats["retries"] == 2
+
+        server.config["rate_limit_rate"] = 0.0
+        assert "candidates" in scheduler.run(call)
+    finally:
+        server.stop()
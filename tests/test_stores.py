@@ -0,0 +1,121 @@
+import sqlite3
+
+import pytest
+
+import sqlite_store
+from document_store import DocumentStore
+from requisition_store import RequisitionStore
+from result_cache import ResultCache
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    # Every connection a store opens, so tests can check none is left open
+    opened = []
+    original = sqlite3.connect
+
+    def connect(*args, **kwargs):
+        conn = original(*args, **kwargs)
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(sqlite_store.sqlite3, "connect", connect)
+    return opened
+
+
+def is_closed(conn):
+    try:
+        conn.execute("SELECT 1")
+    except sqlite3.ProgrammingError:
+        return True
+    return False
+
+
+def test_connections_are_closed(tmp_path, connections):
+    cache = ResultCache(str(tmp_path / "results.sqlite3"))
+    cache.set("a", "1")
+    assert cache.get("a") == "1"
+    store = DocumentStore(str(tmp_path / "documents.sqlite3"))
+    store.put("doc", [{"mime_type": "text/plain", "data": "text"}], {"path": "text"})
+    assert store.get("doc")[1] == {"path": "text"}
+    requisitions = RequisitionStore(str(tmp_path / "requisitions.sqlite3"))
+    requisitions.save("job", "hash", {"status": "scored"}, "text")
+    assert requisitions.load("job")["hash"]["record"] == {"status": "scored"}
+    assert connections and all(is_closed(conn) for conn in connections)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr("result_cache.time.time", lambda: next(clock))
+    cache = ResultCache(str(tmp_path / "results.sqlite3"), max_bytes=25, ttl_seconds=0)
+    cache.set("a", "x" * 10)
+    cache.set("b", "x" * 10)
+    assert cache.get("a") is not None
+    cache.set("c", "x" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["bytes"] == 20
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("result_cache.time.time", lambda: now[0])
+    cache = ResultCache(str(tmp_path / "results.sqlite3"), ttl_seconds=60)
+    cache.set("a", "1")
+    now[0] += 61
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_requisitions_are_cleared_separately(tmp_path):
+    store = RequisitionStore(str(tmp_path / "requisitions.sqlite3"))
+    store.save("one", "hash", {}, "")
+    store.save("two", "hash", {}, "")
+    store.clear("one")
+    assert store.load("one") == {} and store.load("two")
+    store.clear()
+    assert store.load("two") == {}
+
+
+def test_embedding_cache_round_trip_and_eviction(tmp_path, connections):
+    np = pytest.importorskip("numpy")
+    from semantic import EmbeddingCache
+
+    # Each entry is 2 x 4 float16 values, 16 bytes
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), max_bytes=40)
+    vectors = {key: np.full((2, 4), i, dtype=np.float16) for i, key in enumerate("abc")}
+    cache.put_many({"a": vectors["a"], "b": vectors["b"]})
+    assert cache.get_many(["a"])["a"].tolist() == vectors["a"].tolist()
+    cache.put_many({"c": vectors["c"]})
+    assert sorted(cache.get_many(["a", "b", "c"])) == ["a", "c"]
+    cache.clear()
+    assert cache.get_many(["a", "c"]) == {}
+    assert all(is_closed(conn) for conn in connections)
+
+
+def test_vector_index_sees_removals_from_other_instances(tmp_path, connections):
+    np = pytest.importorskip("numpy")
+    from vector_index import VectorIndex
+
+    path = str(tmp_path / "index.sqlite3")
+    index, other = VectorIndex(path), VectorIndex(path)
+    index.add([(key, key, np.ones((1, 4))) for key in "ab"])
+    assert len(other) == 2
+    index.remove(["a"])
+    assert other.keys() == ["b"]
+    index.clear()
+    index.add([("c", "c", np.ones((1, 4)))])
+    assert other.keys() == ["c"]
+    assert all(is_closed(conn) for conn in connections)
+
+
+def test_evicted_documents_are_reported(tmp_path, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr("document_store.time.time", lambda: next(clock))
+    evicted = []
+    store = DocumentStore(str(tmp_path / "documents.sqlite3"), max_bytes=100, on_evict=evicted.extend)
+    for key in "ab":
+        store.put(key, [{"mime_type": "text/plain", "data": "x" * 20}], {})
+    assert evicted == ["a"] and store.get("a") is None
+    store.clear(keep=["b"])
+    assert store.get("b") is not None
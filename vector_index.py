@@ -0,0 +1,122 @@
+import time
+
+import numpy as np
+
+from semantic import flat_coverage
+from sqlite_store import SQLiteStore
+
+
+class VectorIndex(SQLiteStore):
+    """Persistent flat index of resume chunk embeddings, searched exhaustively with NumPy.
+
+    Rows live in SQLite so every process (UI, CLI) sees the same archive; each
+    instance mirrors them in one in-memory float16 matrix and picks up rows
+    added by other processes before every search. Removing rows bumps a
+    generation number stored alongside them, which makes every instance
+    rebuild its mirror instead of only reading rows past the last one it saw.
+    """
+
+    TABLE = "documents"
+    COLUMNS = "key TEXT PRIMARY KEY, name TEXT NOT NULL, rows INTEGER NOT NULL, vectors BLOB NOT NULL, added REAL NOT NULL"
+
+    def __init__(self, path, block_documents=4096):
+        super().__init__(path)
+        self.block_documents = block_documents
+        self._generation = None
+        self._reset()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS generation (id INTEGER PRIMARY KEY CHECK (id = 0), value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO generation (id, value) VALUES (0, 0)")
+
+    def _reset(self):
+        self._keys, self._names, self._counts, self._blocks = [], [], [], []
+        self._known = set()
+        self._last_rowid = 0
+        self._matrix = None
+
+    def _refresh(self):
+        with self._connect() as conn:
+            generation = conn.execute("SELECT value FROM generation WHERE id = 0").fetchone()[0]
+            if generation != self._generation:
+                # Rows were removed, possibly by another process: start again from the first row
+                self._reset()
+                self._generation = generation
+            rows = conn.execute(
+                "SELECT rowid, key, name, rows, vectors FROM documents WHERE rowid > ? ORDER BY rowid",
+                (self._last_rowid,)
+            ).fetchall()
+        for rowid, key, name, count, vectors in rows:
+            self._last_rowid = rowid
+            if key in self._known:
+                continue
+            self._known.add(key)
+            self._keys.append(key)
+            self._names.append(name)
+            self._counts.append(count)
+            self._blocks.append(np.frombuffer(vectors, dtype=np.float16).reshape(count, -1))
+        if rows:
+            self._matrix = None
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._keys)
+
+    def missing(self, keys):
+        with self._lock:
+            self._refresh()
+            return [key for key in keys if key not in self._known]
+
+    def add(self, entries):
+        """Store (key, name, chunk vectors) entries; keys already in the index are skipped."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO documents (key, name, rows, vectors, added) VALUES (?, ?, ?, ?, ?)",
+                [(key, name, len(vectors), vectors.astype(np.float16).tobytes(), now) for key, name, vectors in entries]
+            )
+
+    def search(self, requirement_vectors, top_n):
+        """Return [(key, name, coverage)] for the top_n documents, best first."""
+        with self._lock:
+            self._refresh()
+            if not self._keys:
+                return []
+            if self._matrix is None:
+                self._matrix = np.vstack(self._blocks)
+                self._offsets = np.concatenate(([0], np.cumsum(self._counts)))
+            matrix, offsets, keys, names = self._matrix, self._offsets, list(self._keys), list(self._names)
+        requirement_vectors = requirement_vectors.astype(np.float32)
+        coverage = np.empty(len(keys))
+        # Scored a block of documents at a time so the similarity matrix stays small for large archives
+        for start in range(0, len(keys), self.block_documents):
+            end = min(start + self.block_documents, len(keys))
+            chunks = matrix[offsets[start]:offsets[end]].astype(np.float32)
+            coverage[start:end] = flat_coverage(requirement_vectors, chunks, offsets[start:end] - offsets[start])
+        order = np.argsort(-coverage, kind="stable")[:top_n]
+        return [(keys[i], names[i], float(coverage[i])) for i in order]
+
+    def keys(self):
+        with self._lock:
+            self._refresh()
+            return list(self._keys)
+
+    def remove(self, keys):
+        """Drop the given document keys, e.g. once their stored documents are gone."""
+        keys = list(keys)
+        if not keys:
+            return
+        with self._lock, self._connect() as conn:
+            deleted = 0
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                deleted += conn.execute(
+                    f"DELETE FROM documents WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).rowcount
+            if deleted:
+                conn.execute("UPDATE generation SET value = value + 1 WHERE id = 0")
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM documents")
+            conn.execute("UPDATE generation SET value = value + 1 WHERE id = 0")